@@ -0,0 +1,48 @@
+"""
+PostgreSQL backend drawing connections from a per-process pool.
+
+Enabled by a SIZE in the POOL setting of a database, e.g.
+`'POOL': {'SIZE': 10, 'TIMEOUT': 30, 'MAX_LIFETIME': 600}`. Closing a
+connection returns it to the pool, so with CONN_MAX_AGE 0 it is reused
+by the next request of any thread rather than kept by one thread,
+which under ASGI may never serve another request.
+"""
+from functools import partial
+
+from django.db.backends.postgresql import base, creation
+
+from core.backends.postgresql.pool import close_pools, get_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def destroy_test_db(self, *args, **kwargs):
+        # Idle pooled connections would keep the database from being
+        # dropped.
+        close_pools()
+        return super().destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.settings_dict, conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+
+        connection = self.pool.get(
+            partial(super().get_new_connection, conn_params)
+        )
+        # Set by get_new_connection for new connections only.
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None and self.pool is not None:
+            self.pool.put(self.connection)
+            return
+        return super()._close()
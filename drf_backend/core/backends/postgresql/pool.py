@@ -0,0 +1,150 @@
+"""
+Per-process pools of PostgreSQL connections.
+"""
+import atexit
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Bounded pool of connections shared by the threads of a process.
+
+    At most max_size connections are open at a time; callers wait up to
+    timeout seconds for one to be returned. Returned connections are
+    rolled back and reused, most recently used first, until they are
+    older than max_lifetime seconds. With health_checks, idle
+    connections are checked before being handed out again."""
+
+    def __init__(self, max_size, timeout, max_lifetime=None,
+                 health_checks=False):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_checks = health_checks
+        self.closed = False
+        self._idle = []
+        self._created_at = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def get(self, connect):
+        """Return an idle connection, or a new one made by connect()."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f'No database connection became available within '
+                f'{self.timeout} seconds.'
+            )
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    connection = connect()
+                    with self._lock:
+                        self._created_at[connection] = time.monotonic()
+                    return connection
+                if not self._expired(connection) and self._usable(connection):
+                    return connection
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection):
+        """Take back a connection handed out by get()."""
+        try:
+            if (not self.closed and not self._expired(connection)
+                    and self._reset(connection)):
+                with self._lock:
+                    self._idle.append(connection)
+                return
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close the idle connections, and the others once returned."""
+        self.closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+    def _expired(self, connection):
+        if self.max_lifetime is None:
+            return False
+        with self._lock:
+            created_at = self._created_at[connection]
+        return time.monotonic() - created_at >= self.max_lifetime
+
+    def _usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _reset(connection):
+        """End any transaction left open; return whether it worked."""
+        if connection.closed:
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _discard(self, connection):
+        with self._lock:
+            self._created_at.pop(connection, None)
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+
+def get_pool(settings_dict, conn_params):
+    """Return the pool of a database, or None if it is not pooled.
+
+    Pools are keyed by the connection parameters as well, as the test
+    runner connects with the settings of an alias to other databases."""
+    pool_settings = settings_dict.get('POOL') or {}
+    if not pool_settings.get('SIZE'):
+        return None
+    key = repr(sorted(conn_params.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                max_size=pool_settings['SIZE'],
+                timeout=pool_settings.get('TIMEOUT', 30),
+                max_lifetime=pool_settings.get('MAX_LIFETIME'),
+                health_checks=settings_dict['CONN_HEALTH_CHECKS']
+            )
+        return pool
+
+
+@atexit.register
+def close_pools():
+    """Close every pool of the process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
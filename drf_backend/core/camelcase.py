@@ -0,0 +1,178 @@
+"""
+Fast camelCase and snake_case conversion of API data.
+
+Drop-in replacements for camelize and underscoreize from
+djangorestframework_camel_case.util, giving identical results. Key
+conversions are cached, scalars are returned without the iteration
+probe the library makes for every value, and camelized dicts are
+marked so they are not walked again, e.g. when served from a cache.
+"""
+import datetime
+import math
+import uuid
+from decimal import Decimal
+from functools import lru_cache
+
+from django.core.files import File
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.util import (camelize_re,
+                                                 get_underscoreize_re,
+                                                 underscore_to_camel)
+
+SCALAR_TYPES = frozenset((
+    str, int, float, bool, type(None), Decimal, uuid.UUID,
+    datetime.date, datetime.datetime, datetime.time, datetime.timedelta,
+))
+
+# Bounds keeping the number of cached keys, some sent by clients, small.
+KEY_CACHE_SIZE = 4096
+
+
+class CamelCaseDict(dict):
+    """Dict whose keys, and those of nested dicts, are camelized."""
+    # Whether all floats within are written the same by json and orjson.
+    plain_floats = False
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def camelize_key(key):
+    """Return a snake_case key in camelCase."""
+    if '_' not in key:
+        return key
+    return camelize_re.sub(underscore_to_camel, key)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def underscore_key(key, no_underscore_before_number=False):
+    """Return a camelCase key in snake_case."""
+    underscoreize_re = get_underscoreize_re(
+        {'no_underscore_before_number': no_underscore_before_number}
+    )
+    return underscoreize_re.sub(r'\1_\2', key).lower()
+
+
+def _is_plain_float(value):
+    """Return whether repr() writes the float without an exponent, as
+       orjson does; it differs from json for exponents and NaN."""
+    return value == 0 or (
+        math.isfinite(value) and 1e-4 <= abs(value) < 1e16
+    )
+
+
+class Camelizer:
+    """Converts data like camelize(), noting whether it holds floats that
+       orjson would encode differently from the json module."""
+
+    def __init__(self, ignore_fields=None, ignore_keys=None, **options):
+        self.ignore_fields = ignore_fields or ()
+        self.ignore_keys = ignore_keys or ()
+        self.plain_floats = True
+
+    def convert(self, data):
+        data_type = type(data)
+        if data_type in SCALAR_TYPES:
+            if data_type is float and not _is_plain_float(data):
+                self.plain_floats = False
+            return data
+        if data_type is CamelCaseDict:
+            self.plain_floats = self.plain_floats and data.plain_floats
+            return data
+        if isinstance(data, Promise):
+            return force_str(data)
+        if isinstance(data, dict):
+            return self.convert_dict(data)
+        if data_type is list or data_type is tuple:
+            return [self.convert(item) for item in data]
+        if isinstance(data, str):
+            return data
+        try:
+            items = iter(data)
+        except TypeError:
+            return data
+        return [self.convert(item) for item in items]
+
+    def convert_dict(self, data):
+        outer_plain_floats, self.plain_floats = self.plain_floats, True
+        new_dict = CamelCaseDict()
+        for key, value in data.items():
+            if isinstance(key, Promise):
+                key = force_str(key)
+            if isinstance(key, str):
+                new_key = camelize_key(key)
+            else:
+                new_key = key
+                if type(key) is float and not _is_plain_float(key):
+                    self.plain_floats = False
+            if key in self.ignore_fields or new_key in self.ignore_fields:
+                result = value
+            else:
+                result = self.convert(value)
+            if key in self.ignore_keys or new_key in self.ignore_keys:
+                new_dict[key] = result
+            else:
+                new_dict[new_key] = result
+        new_dict.plain_floats = self.plain_floats
+        self.plain_floats = outer_plain_floats and self.plain_floats
+        return new_dict
+
+
+def camelize(data, **options):
+    """Return data with all dict keys converted to camelCase."""
+    return Camelizer(**options).convert(data)
+
+
+def underscoreize(data, **options):
+    """Return data with all dict keys converted to snake_case."""
+    no_number = bool(options.get('no_underscore_before_number'))
+    ignore_fields = options.get('ignore_fields') or ()
+    ignore_keys = options.get('ignore_keys') or ()
+    data_type = type(data)
+    if data_type in SCALAR_TYPES:
+        return data
+    if isinstance(data, dict):
+        if data_type == MultiValueDict:
+            new_data = MultiValueDict()
+            for key in data:
+                new_data.setlist(
+                    underscore_key(key, no_number), data.getlist(key)
+                )
+            return new_data
+        items = data.lists() if isinstance(data, QueryDict) else data.items()
+        new_dict = {}
+        for key, value in items:
+            new_key = (underscore_key(key, no_number)
+                       if isinstance(key, str) else key)
+            if key in ignore_fields or new_key in ignore_fields:
+                result = value
+            else:
+                result = underscoreize(value, **options)
+            if key in ignore_keys or new_key in ignore_keys:
+                new_dict[key] = result
+            else:
+                new_dict[new_key] = result
+        if isinstance(data, QueryDict):
+            new_query = QueryDict(mutable=True)
+            for key, value in new_dict.items():
+                new_query.setlist(key, value)
+            return new_query
+        return new_dict
+    if data_type is list:
+        return [underscoreize(item, **options) for item in data]
+    if isinstance(data, (str, File)):
+        return data
+    try:
+        items = iter(data)
+    except TypeError:
+        return data
+    return [underscoreize(item, **options) for item in items]
+
+
+def needs_underscoreize(query_dict, **options):
+    """Return whether any query parameter name is not snake_case."""
+    no_number = bool(options.get('no_underscore_before_number'))
+    return any(
+        underscore_key(key, no_number) != key for key in query_dict
+    )
@@ -0,0 +1,211 @@
+"""
+Resized and recompressed variants of recipe images.
+"""
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core.models import StoredImage
+
+# Formats accepted for uploads; anything else is rejected from its header.
+UPLOAD_FORMATS = ('JPEG', 'PNG', 'WEBP', 'BMP')
+
+# File extensions of stored images by format.
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'BMP': '.bmp'}
+
+# Options for re-encoding originals whose metadata was stripped.
+ORIGINAL_FORMATS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+    'BMP': {},
+}
+
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82,
+             'optimize': True, 'progressive': True},
+}
+
+
+class InvalidImage(ValueError):
+    """Raised for files that are not acceptable images."""
+
+
+def _check_pixels(width, height):
+    if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise InvalidImage(
+            f'Images must have at most '
+            f'{settings.RECIPE_IMAGE_MAX_PIXELS} pixels.'
+        )
+
+
+def inspect_image(file):
+    """Return the format, width and height of an uploaded image.
+
+    Only the file header is parsed, so byte and pixel limits are
+    enforced before any pixel data is decoded. Raises InvalidImage."""
+    if file.size > settings.RECIPE_IMAGE_MAX_BYTES:
+        raise InvalidImage(
+            f'Images must be at most {settings.RECIPE_IMAGE_MAX_BYTES} bytes.'
+        )
+    try:
+        file.seek(0)
+        with Image.open(file, formats=UPLOAD_FORMATS) as img:
+            image_format, (width, height) = img.format, img.size
+    except Image.DecompressionBombError:
+        width = height = settings.RECIPE_IMAGE_MAX_PIXELS
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise InvalidImage(
+            'Upload a valid image. The file you uploaded was either not an '
+            'image or a corrupted image.'
+        )
+    finally:
+        file.seek(0)
+    _check_pixels(width, height)
+    return image_format, width, height
+
+
+def content_name(file, image_format):
+    """Return a file name made of the SHA-256 digest of the file."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return f'{digest.hexdigest()}{EXTENSIONS[image_format]}'
+
+
+def acquire_image(storage, name, content):
+    """Count a new reference to an image, storing its file if missing,
+       and return its entry.
+
+    The file is saved while the row is locked, so a concurrent release
+    of the last reference or a media sweep cannot delete it after it
+    was found to exist."""
+    with transaction.atomic():
+        stored_image, _ = StoredImage.objects.select_for_update(
+        ).get_or_create(name=name)
+        stored_image.ref_count = F('ref_count') + 1
+        stored_image.save(update_fields=['ref_count'])
+        storage.save(name, content)
+    stored_image.refresh_from_db()
+    return stored_image
+
+
+def release_image(storage, name):
+    """Drop a reference to a stored image, deleting the file and its
+       variants once no recipe references it."""
+    if not name:
+        return
+    with transaction.atomic():
+        stored_image = StoredImage.objects.select_for_update().filter(
+            name=name
+        ).first()
+        if stored_image is None:
+            return
+        if stored_image.ref_count > 1:
+            stored_image.ref_count = F('ref_count') - 1
+            stored_image.save(update_fields=['ref_count'])
+            return
+        # Files are deleted under the row lock, so a concurrent
+        # acquire_image() waits and then stores the file again.
+        delete_image_variants(storage, stored_image.variants)
+        storage.delete(name)
+        stored_image.delete()
+
+
+def variant_name(image_name, width, variant_format):
+    """Return the storage name of an image variant."""
+    root = os.path.splitext(os.path.basename(image_name))[0]
+    return os.path.join(
+        'uploads', 'recipe', 'variants',
+        f'{root}-{width}w.{variant_format}'
+    )
+
+
+def variant_widths(original_width):
+    """Return the widths to generate for an image.
+
+    Images are never upscaled; one smaller than every configured width
+    still gets a single variant at its own width to use as thumbnail."""
+    widths = [
+        width for width in settings.RECIPE_IMAGE_VARIANT_WIDTHS
+        if width < original_width
+    ]
+    return widths or [original_width]
+
+
+def _strip_metadata(image, original, image_format):
+    """Rewrite the stored original without EXIF and XMP metadata, such
+       as GPS coordinates.
+
+    It keeps its name, the digest of the uploaded bytes, so uploading
+    the same file again still finds it."""
+    icc_profile = original.info.get('icc_profile')
+    buffer = BytesIO()
+    original.save(
+        buffer,
+        format=image_format,
+        **ORIGINAL_FORMATS[image_format],
+        **({'icc_profile': icc_profile} if icc_profile else {})
+    )
+    image.storage.replace(image.name, ContentFile(buffer.getvalue()))
+
+
+def create_image_variants(image):
+    """Save resized WebP and JPEG variants of an image file, first
+       stripping metadata from the original.
+
+    The pixel limit is checked again before decoding, so a file that
+    bypassed upload validation cannot exhaust worker memory. Returns a
+    list of {'width', 'format', 'name'} dicts describing the saved
+    variants, smallest first."""
+    image.open('rb')
+    try:
+        with Image.open(image, formats=UPLOAD_FORMATS) as original:
+            _check_pixels(original.width, original.height)
+            image_format = original.format
+            has_metadata = bool(
+                original.getexif() or 'xmp' in original.info
+                or 'XML:com.adobe.xmp' in original.info
+            )
+            original = ImageOps.exif_transpose(original)
+            original.info.pop('exif', None)
+    finally:
+        image.close()
+    if has_metadata:
+        _strip_metadata(image, original, image_format)
+    original = original.convert('RGB')
+
+    variants = []
+    for width in variant_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize(
+            (width, height), Image.LANCZOS, reducing_gap=3.0
+        )
+        for variant_format, options in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            name = image.storage.save(
+                variant_name(image.name, width, variant_format),
+                ContentFile(buffer.getvalue())
+            )
+            variants.append({
+                'width': width,
+                'format': variant_format,
+                'name': name,
+            })
+    return variants
+
+
+def delete_image_variants(storage, variants):
+    """Delete the files of previously created variants."""
+    for variant in variants:
+        storage.delete(variant['name'])
@@ -0,0 +1,112 @@
+"""
+Database-backed background jobs.
+
+Functions registered with @task are run by `manage.py worker` for jobs
+created with enqueue(). Workers claim jobs with SELECT ... FOR UPDATE
+SKIP LOCKED, so any number of them can poll the same table.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def task(name):
+    """Register a function, called with the job, as the task `name`."""
+    def register(func):
+        _tasks[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, user=None, max_attempts=3):
+    """Create and return a queued job for a registered task."""
+    if name not in _tasks:
+        raise LookupError(f'Unknown task {name!r}.')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        max_attempts=max_attempts
+    )
+
+
+def claim_jobs(limit):
+    """Mark up to `limit` due jobs as running and return them.
+
+    Jobs whose worker died while running them are claimed again once
+    their lock expires."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.filter(
+                Q(status=Job.QUEUED, run_at__lte=now)
+                | Q(status=Job.RUNNING, locked_until__lt=now)
+            ).order_by('run_at').select_for_update(
+                skip_locked=True
+            ).values_list('id', flat=True)[:limit]
+        )
+        Job.objects.filter(id__in=ids).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.JOB_LOCK_TIMEOUT),
+            updated_at=now
+        )
+    return list(Job.objects.filter(id__in=ids).order_by('run_at'))
+
+
+def run_job(job):
+    """Run a claimed job, recording its result or scheduling a retry."""
+    func = _tasks.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.name!r}.')
+        job.result = func(job)
+    except Exception:
+        logger.exception('Job %s failed', job)
+        job.error = traceback.format_exc()
+        if func is not None and job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.SUCCEEDED
+        job.error = ''
+    job.locked_until = None
+    job.save(update_fields=[
+        'status', 'result', 'error', 'run_at', 'locked_until', 'updated_at'
+    ])
+    return job
+
+
+def run_job_in_thread(job):
+    """Run a job from a worker thread, which owns its DB connections."""
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_pending_jobs():
+    """Run due jobs in this thread until none are left; return the count."""
+    count = 0
+    while True:
+        jobs = claim_jobs(settings.JOB_WORKER_CONCURRENCY)
+        if not jobs:
+            return count
+        for job in jobs:
+            run_job(job)
+        count += len(jobs)
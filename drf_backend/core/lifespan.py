@@ -0,0 +1,50 @@
+"""
+Opening and closing of database connections with server processes.
+"""
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from core.backends.postgresql.pool import close_pools
+
+
+def check_connections():
+    """Connect to every database, so that an unreachable one fails the
+       start rather than the first requests and pools start warm."""
+    for connection in connections.all():
+        connection.ensure_connection()
+        connection.close()
+
+
+def close_connections():
+    """Close the connections of this thread and those of every pool."""
+    connections.close_all()
+    close_pools()
+
+
+def with_lifespan(application):
+    """Wrap an ASGI application to check the databases on startup and
+       close pooled connections on shutdown.
+
+    Django 4.1 does not handle ASGI lifespan events itself."""
+    async def lifespan_application(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await sync_to_async(check_connections)()
+                except Exception as exc:
+                    await send({
+                        'type': 'lifespan.startup.failed',
+                        'message': str(exc),
+                    })
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await sync_to_async(close_connections)()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return lifespan_application
@@ -0,0 +1,164 @@
+"""
+Django command deleting recipe image files no recipe references.
+"""
+import os
+import time
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.template.defaultfilters import filesizeformat
+
+from core.models import Recipe, StoredImage
+from core.storage import recipe_image_storage
+
+UPLOAD_DIR = os.path.join('uploads', 'recipe')
+VARIANT_DIR = os.path.join(UPLOAD_DIR, 'variants')
+
+
+def scan_files(storage, directory):
+    """Yield (name, size, mtime) of every file below a directory.
+
+    Directories are read entry by entry, so memory use does not grow
+    with the number of files."""
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = os.scandir(storage.path(current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = os.path.join(current, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_size, stat.st_mtime
+
+
+def referenced_names(names):
+    """Return the names, of originals or variants, still referenced by a
+       recipe or a stored image."""
+    originals = [name for name in names if not is_variant(name)]
+    variants = [name for name in names if is_variant(name)]
+    referenced = set(
+        Recipe.objects.filter(image__in=originals).values_list(
+            'image', flat=True
+        )
+    )
+    if variants:
+        for model, field in ((Recipe, 'image_variants'),
+                             (StoredImage, 'variants')):
+            query = reduce(or_, (
+                Q(**{f'{field}__contains': [{'name': name}]})
+                for name in variants
+            ))
+            for listed in model.objects.filter(query).values_list(
+                    field, flat=True).distinct():
+                referenced.update(variant['name'] for variant in listed)
+    return referenced & set(names)
+
+
+def is_variant(name):
+    return name.startswith(VARIANT_DIR + os.sep)
+
+
+class Command(BaseCommand):
+    """Django command to delete orphaned recipe image files."""
+    help = ('Delete files under MEDIA_ROOT/uploads/recipe that no recipe '
+            'references.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the files that would be deleted.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of files looked up per database query.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=24 * 60 * 60,
+            help='Seconds since a file was last written before it may be '
+                 'deleted, protecting uploads still in progress.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.storage = recipe_image_storage
+        self.dry_run = options['dry_run']
+        self.min_age = options['min_age']
+        stats = {'scanned': 0, 'orphaned': 0, 'deleted': 0, 'bytes': 0}
+        started = time.monotonic()
+
+        files = scan_files(self.storage, UPLOAD_DIR)
+        while batch := list(islice(files, options['batch_size'])):
+            stats['scanned'] += len(batch)
+            orphans = self.find_orphans(batch)
+            stats['orphaned'] += len(orphans)
+            if self.dry_run:
+                for name, size, _ in orphans:
+                    self.stdout.write(f'Would delete {name}')
+                    stats['bytes'] += size
+            else:
+                deleted = self.delete(orphans)
+                stats['deleted'] += len(deleted)
+                stats['bytes'] += sum(size for _, size, _ in deleted)
+            if options['verbosity'] > 1:
+                self.report(stats, started)
+
+        self.report(stats, started)
+
+    def is_recent(self, mtime):
+        return time.time() - mtime < self.min_age
+
+    def find_orphans(self, batch):
+        """Return the old enough files of a batch nothing references."""
+        candidates = [f for f in batch if not self.is_recent(f[2])]
+        if not candidates:
+            return []
+        referenced = referenced_names([name for name, _, _ in candidates])
+        return [f for f in candidates if f[0] not in referenced]
+
+    def delete(self, orphans):
+        """Delete orphaned files, checking again under the stored image
+           row locks taken by uploads and releases."""
+        if not orphans:
+            return []
+        names = [name for name, _, _ in orphans]
+        deleted = []
+        with transaction.atomic():
+            list(StoredImage.objects.select_for_update().filter(
+                name__in=names
+            ))
+            referenced = referenced_names(names)
+            for name, size, _ in orphans:
+                try:
+                    mtime = os.stat(self.storage.path(name)).st_mtime
+                except FileNotFoundError:
+                    continue
+                if name in referenced or self.is_recent(mtime):
+                    continue
+                self.storage.delete(name)
+                deleted.append((name, size, mtime))
+            StoredImage.objects.filter(
+                name__in=[name for name, _, _ in deleted]
+            ).delete()
+        return deleted
+
+    def report(self, stats, started):
+        """Write the progress and throughput so far."""
+        elapsed = time.monotonic() - started
+        rate = stats['scanned'] / elapsed if elapsed else 0
+        action = 'would free' if self.dry_run else 'freed'
+        self.stdout.write(
+            f'Scanned {stats["scanned"]} files in {elapsed:.1f}s '
+            f'({rate:.0f} files/s), {stats["orphaned"]} orphaned, '
+            f'{stats["deleted"]} deleted, {action} '
+            f'{filesizeformat(stats["bytes"])}.'
+        )
@@ -0,0 +1,78 @@
+"""
+Django command running queued background jobs.
+"""
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from core.jobs import claim_jobs, run_job_in_thread
+from core.lifespan import close_connections
+
+
+class Command(BaseCommand):
+    """Django command to run background jobs.
+
+    Jobs run in a pool of threads; Pillow releases the GIL while
+    decoding, resizing and encoding, so image jobs run in parallel.
+    Start more worker processes to use more cores."""
+    help = 'Run queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help='Number of jobs run at the same time.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once no due jobs are left.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        concurrency = options['concurrency']
+        self.stopping = False
+        handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+
+        self.stdout.write(f'Worker started with {concurrency} threads.')
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                self.run(pool, concurrency, options['burst'])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+            close_connections()
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
+
+    def run(self, pool, concurrency, burst):
+        """Keep every thread busy with claimed jobs until stopped."""
+        running = set()
+        while not self.stopping:
+            if len(running) < concurrency:
+                running.update(
+                    pool.submit(run_job_in_thread, job)
+                    for job in claim_jobs(concurrency - len(running))
+                )
+            if not running:
+                if burst:
+                    break
+                time.sleep(settings.JOB_POLL_INTERVAL)
+                continue
+            done, running = wait(
+                running,
+                timeout=settings.JOB_POLL_INTERVAL,
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                job = future.result()
+                self.stdout.write(f'{job}: {job.status}')
+
+    def stop(self, signum, frame):
+        """Finish the running jobs, then exit."""
+        self.stopping = True
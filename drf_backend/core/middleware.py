@@ -0,0 +1,94 @@
+"""
+Middleware for the APIs.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from djangorestframework_camel_case.settings import api_settings
+
+from core.camelcase import needs_underscoreize, underscoreize
+from core.routers import (client_key, is_pinned, pin_to_primary,
+                          request_routing, user_key)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware running natively in sync and async mode.
+
+    Instances are awaitable when the next handler is, and subclasses
+    dispatch to an async path when asyncio.iscoroutinefunction(self)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does, so the handler awaits it.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class CamelCaseMiddleware(AsyncCapableMiddleware):
+    """Convert camelCase query parameter names to snake_case.
+
+    Unlike the middleware of djangorestframework_camel_case, request.GET
+    is only rebuilt if a name actually changes. It runs natively in both
+    modes, so async views are not sent to a thread because of it."""
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        return await self.get_response(request)
+
+    def process_request(self, request):
+        options = api_settings.JSON_UNDERSCOREIZE
+        if needs_underscoreize(request.GET, **options):
+            request.GET = underscoreize(request.GET, **options)
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """Let core.routers.ReplicaRouter send the reads of safe requests
+       to replicas, and pin clients to the primary after they write."""
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = client_key(request)
+        use_replicas = (request.method in SAFE_METHODS
+                        and not (key and is_pinned(key)))
+        with request_routing(use_replicas) as routing:
+            response = self.get_response(request)
+        if routing.wrote:
+            self.pin(request, key)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = client_key(request)
+        use_replicas = (request.method in SAFE_METHODS
+                        and not (key and await sync_to_async(is_pinned)(key)))
+        with request_routing(use_replicas) as routing:
+            response = await self.get_response(request)
+        if routing.wrote:
+            await sync_to_async(self.pin)(request, key)
+        return response
+
+    def pin(self, request, key):
+        """Pin the client, and for the list cache the user, after a write."""
+        if key:
+            pin_to_primary(key)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user_key(user.id))
@@ -0,0 +1,48 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:10
+
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge tags and ingredients whose names differ only by case,
+       so the case-insensitive unique constraints can be built."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in (('Tag', 'tags'),
+                                   ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field_name).through
+        fk_name = f'{model_name.lower()}_id'
+        named = model.objects.annotate(lower_name=Lower('name'))
+        duplicates = named.values('user_id', 'lower_name').annotate(
+            keep_id=Min('id'),
+            total=Count('id')
+        ).filter(total__gt=1)
+
+        for duplicate in duplicates:
+            duplicate_ids = list(named.filter(
+                user_id=duplicate['user_id'],
+                lower_name=duplicate['lower_name']
+            ).exclude(id=duplicate['keep_id']).values_list('id', flat=True))
+            recipe_ids = through.objects.filter(
+                **{f'{fk_name}__in': duplicate_ids}
+            ).values_list('recipe_id', flat=True).distinct()
+            through.objects.bulk_create(
+                [through(recipe_id=recipe_id,
+                         **{fk_name: duplicate['keep_id']})
+                 for recipe_id in recipe_ids],
+                ignore_conflicts=True
+            )
+            model.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
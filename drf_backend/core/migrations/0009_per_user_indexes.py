@@ -0,0 +1,60 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def unique_index_concurrently(model_name, table, constraint):
+    """Build a functional unique constraint without locking out writes."""
+    return migrations.SeparateDatabaseAndState(
+        database_operations=[
+            migrations.RunSQL(
+                f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS '
+                f'"{constraint.name}" ON "{table}" '
+                f'("user_id", (LOWER("name")));',
+                reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS '
+                            f'"{constraint.name}";',
+            ),
+        ],
+        state_operations=[
+            migrations.AddConstraint(
+                model_name=model_name,
+                constraint=constraint,
+            ),
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_merge_duplicate_tags_ingredients'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-name', 'id'], name='ingredient_user_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', '-name', 'id'], name='tag_user_name_idx'),
+        ),
+        unique_index_concurrently(
+            'ingredient',
+            'core_ingredient',
+            models.UniqueConstraint(models.F('user'), django.db.models.functions.text.Lower('name'), name='unique_ingredient_name_per_user'),
+        ),
+        unique_index_concurrently(
+            'tag',
+            'core_tag',
+            models.UniqueConstraint(models.F('user'), django.db.models.functions.text.Lower('name'), name='unique_tag_name_per_user'),
+        ),
+    ]
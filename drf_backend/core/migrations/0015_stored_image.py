@@ -0,0 +1,57 @@
+# Generated by Django 4.1.1 on 2026-10-18 16:10
+
+import core.models
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_image_references(apps, schema_editor):
+    """Create reference counted entries for already uploaded images."""
+    Recipe = apps.get_model('core', 'Recipe')
+    StoredImage = apps.get_model('core', 'StoredImage')
+    images = Recipe.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).values('image').annotate(ref_count=Count('id')).order_by()
+    StoredImage.objects.bulk_create(
+        [
+            StoredImage(
+                name=image['image'],
+                ref_count=image['ref_count'],
+                variants=Recipe.objects.filter(
+                    image=image['image']
+                ).values_list('image_variants', flat=True).first() or []
+            )
+            for image in images.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('variants', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.RunPython(
+            count_image_references,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.1 on 2026-10-18 17:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_stored_image'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['image'], name='recipe_image_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['image_variants'], name='recipe_image_variants_idx', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='storedimage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['variants'], name='stored_image_variants_idx', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1.1 on 2026-10-18 17:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0016_image_reference_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(models.F('user'), django.db.models.functions.comparison.Collate(django.db.models.functions.text.Lower('name'), 'C'), name='ingredient_user_prefix_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(models.F('user'), django.db.models.functions.comparison.Collate(django.db.models.functions.text.Lower('name'), 'C'), name='tag_user_prefix_idx'),
+        ),
+    ]
@@ -3,17 +3,32 @@ Database models.
 """
 import uuid
 import os
+import re
 
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from django.db.models.functions import Collate, Lower
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
 
+from core.storage import recipe_image_storage
+
+CONTENT_NAME_RE = re.compile(r'[0-9a-f]{64}')
+
 
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image"""
-    ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
-    return os.path.join('uploads', 'recipe', filename)
+    """Generate file path for new recipe image.
+
+    Uploads named by their SHA-256 digest (see core.images.content_name)
+    keep that name, so identical files share one path; other files get
+    a random name."""
+    root, ext = os.path.splitext(filename)
+    if not CONTENT_NAME_RE.fullmatch(root):
+        root = str(uuid.uuid4())
+    return os.path.join('uploads', 'recipe', root[:2], f'{root}{ext.lower()}')
 
 
 class UserManager(BaseUserManager):
@@ -64,7 +79,35 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage
+    )
+    # Resized copies of image, see core.images.create_image_variants.
+    image_variants = models.JSONField(default=list, blank=True)
+    # Kept up to date by a database trigger, see migration 0007.
+    search_vector = SearchVectorField(null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped when tags or ingredients of the recipe change.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+            models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='recipe_user_updated_at_idx'
+            ),
+            # Used by the sweep_media command to find referenced files.
+            models.Index(fields=['image'], name='recipe_image_idx'),
+            GinIndex(
+                fields=['image_variants'],
+                opclasses=['jsonb_path_ops'],
+                name='recipe_image_variants_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -78,6 +121,25 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='tag_user_name_idx'
+            ),
+            # Serves autocomplete prefix lookups in lower(name) order.
+            models.Index(
+                F('user'), Collate(Lower('name'), 'C'),
+                name='tag_user_prefix_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                'user', Lower('name'),
+                name='unique_tag_name_per_user'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -90,5 +152,118 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='ingredient_user_name_idx'
+            ),
+            # Serves autocomplete prefix lookups in lower(name) order.
+            models.Index(
+                F('user'), Collate(Lower('name'), 'C'),
+                name='ingredient_user_prefix_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                'user', Lower('name'),
+                name='unique_ingredient_name_per_user'
+            ),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class RefreshToken(models.Model):
+    """Long-lived token exchanged for new signed access tokens."""
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.key
+
+
+class StoredImage(models.Model):
+    """Stored recipe image file with the number of recipes using it.
+
+    Identical uploads share one file; it is deleted, with its variants,
+    once no recipe references it. See core.images.acquire_image."""
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    # Resized copies, shared by every recipe using the image.
+    variants = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Used by the sweep_media command to find referenced files.
+            GinIndex(
+                fields=['variants'],
+                opclasses=['jsonb_path_ops'],
+                name='stored_image_variants_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """Background work run by the `worker` management command."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Running jobs not finished by then are picked up again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['run_at'],
+                condition=models.Q(status='queued'),
+                name='job_queued_run_at_idx'
+            ),
+            models.Index(
+                fields=['locked_until'],
+                condition=models.Q(status='running'),
+                name='job_running_locked_idx'
+            ),
+            models.Index(fields=['user', '-id'], name='job_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,43 @@
+"""
+Parsers for the APIs.
+"""
+from django.conf import settings
+from djangorestframework_camel_case.settings import api_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import json
+
+from core.camelcase import underscoreize
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CamelCaseJSONParser(JSONParser):
+    """JSON parser converting camelCase keys to snake_case, decoding with
+       orjson when installed."""
+    json_underscoreize = api_settings.JSON_UNDERSCOREIZE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        raw = stream.read()
+        try:
+            data = None
+            if orjson is not None and encoding.lower() in ('utf-8', 'utf8'):
+                try:
+                    data = orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    # Fall back for the error messages of the json module.
+                    pass
+            if data is None:
+                parse_constant = json.strict_constant if self.strict else None
+                data = json.loads(
+                    raw.decode(encoding),
+                    parse_constant=parse_constant
+                )
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+        return underscoreize(data, **self.json_underscoreize)
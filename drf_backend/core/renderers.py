@@ -0,0 +1,53 @@
+"""
+Renderers for the APIs.
+"""
+from djangorestframework_camel_case.settings import api_settings
+from rest_framework.renderers import JSONRenderer
+
+from core.camelcase import Camelizer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CamelCaseJSONRenderer(JSONRenderer):
+    """JSON renderer producing the same bytes as the one of
+       djangorestframework_camel_case, faster.
+
+    Keys are converted by core.camelcase, and the result is encoded with
+    orjson, if installed, whenever its output is identical to that of
+    the json module: compact, unescaped and free of floats written with
+    an exponent or out of range."""
+    json_underscoreize = api_settings.JSON_UNDERSCOREIZE
+    orjson_options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    ) if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        camelizer = Camelizer(**self.json_underscoreize)
+        data = camelizer.convert(data)
+        if (orjson is not None and data is not None
+                and camelizer.plain_floats
+                and self.compact and self.strict and not self.ensure_ascii
+                and self.get_indent(
+                    accepted_media_type, renderer_context or {}
+                ) is None):
+            try:
+                ret = orjson.dumps(
+                    data,
+                    default=self.encoder_class().default,
+                    option=self.orjson_options
+                )
+            except orjson.JSONEncodeError:
+                # E.g. integers over 64 bits or lone surrogates.
+                pass
+            else:
+                # Same escaping as JSONRenderer, for embedding in JavaScript.
+                return ret.replace(
+                    b'\xe2\x80\xa8', b'\\u2028'
+                ).replace(b'\xe2\x80\xa9', b'\\u2029')
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,114 @@
+"""
+Routing of database reads to replicas.
+
+Reads made while serving a safe request go to an alias in
+DATABASE_REPLICAS, picked at random once per request. Once a request
+writes, its later reads use the primary, and so do all requests of the
+same client for DB_REPLICA_PIN_SECONDS, so clients always read their
+own writes even while replicas lag behind. Reads outside requests,
+e.g. in jobs and commands, and within transactions on the primary use
+the primary.
+"""
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+class RequestRouting:
+    """Replica routing state of the request being served."""
+
+    def __init__(self, use_replicas):
+        self.replica = None
+        if use_replicas and settings.DATABASE_REPLICAS:
+            self.replica = random.choice(settings.DATABASE_REPLICAS)
+        self.wrote = False
+        self.read_replica = False
+
+
+@contextmanager
+def request_routing(use_replicas):
+    """Route the queries made within the block as those of a request.
+
+    The state is kept in a context variable, so it follows the request
+    into the threads of sync_to_async."""
+    routing = RequestRouting(use_replicas)
+    token = _routing.set(routing)
+    try:
+        yield routing
+    finally:
+        _routing.reset(token)
+
+
+def read_from_replica():
+    """Return whether the request being served read from a replica."""
+    routing = _routing.get()
+    return routing is not None and routing.read_replica
+
+
+def client_key(request):
+    """Return a key identifying the client by its credentials, if any."""
+    credentials = (request.META.get('HTTP_AUTHORIZATION')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    return hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def user_key(user_id):
+    """Return a key identifying all clients of the user."""
+    return f'user:{user_id}'
+
+
+def _pin_key(key):
+    return f'db-pin:{key}'
+
+
+def pin_to_primary(key):
+    """Send the client's reads to the primary for a while."""
+    caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].set(
+        _pin_key(key), True, settings.DB_REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned(key):
+    """Return whether the client recently wrote."""
+    return caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].get(
+        _pin_key(key), False
+    )
+
+
+class ReplicaRouter:
+    """Database router sending request reads to replicas."""
+    # Credentials are used right after they are created, e.g. tokens on
+    # login, when the client cannot have been pinned yet.
+    primary_apps = ('authtoken', 'sessions')
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if (routing is None or routing.replica is None or routing.wrote
+                or model._meta.app_label in self.primary_apps
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        routing.read_replica = True
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations between objects of the primary and replicas,
+           which hold the same data, also while reads are not routed."""
+        if (obj1._state.db in settings.DATABASES
+                and obj2._state.db in settings.DATABASES):
+            return True
+        return None
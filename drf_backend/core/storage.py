@@ -0,0 +1,57 @@
+"""
+File storage for content-addressed recipe images.
+"""
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+class _AlreadyStored(Exception):
+
+    def __init__(self, name):
+        self.name = name
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage whose names are derived from file contents.
+
+    A file saved under an existing name is assumed to be identical to
+    the stored one, so it is not written again and keeps its name
+    instead of getting a random suffix. Its modification time is
+    bumped instead, which the sweep_media command treats as recent
+    use."""
+
+    def get_available_name(self, name, max_length=None):
+        if self.exists(name):
+            raise _AlreadyStored(name)
+        return super().get_available_name(name, max_length=max_length)
+
+    def save(self, name, content, max_length=None):
+        """Save the file unless it is already stored; return its name."""
+        try:
+            return super().save(name, content, max_length=max_length)
+        except _AlreadyStored as exc:
+            os.utime(self.path(exc.name))
+            return exc.name
+
+    def replace(self, name, content):
+        """Atomically overwrite a stored file, e.g. after stripping its
+           metadata, so readers never see a partially written file."""
+        path = self.path(name)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in content.chunks():
+                    tmp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+recipe_image_storage = ContentAddressedStorage()
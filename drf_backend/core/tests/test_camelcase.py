@@ -0,0 +1,200 @@
+"""
+Tests for camelCase conversion, rendering and parsing.
+"""
+import asyncio
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase
+from django.utils.translation import gettext_lazy
+from djangorestframework_camel_case import render as library_render
+from djangorestframework_camel_case import util as library_util
+from rest_framework.exceptions import ParseError
+
+from core.camelcase import camelize, needs_underscoreize, underscoreize
+from core.middleware import CamelCaseMiddleware
+from core.parsers import CamelCaseJSONParser
+from core.renderers import CamelCaseJSONRenderer
+
+SAMPLES = [
+    None,
+    [],
+    {'recipe_id': 1, 'title': 'Soup', 'time_minutes': 10, 'link': ''},
+    [{'nested_list': [{'tag_name': 'a'}, ('b', 'c')], 'user_2fa': True}],
+    {'price': Decimal('5.50'), 'rating': 4.5, 'tiny': 1e-7, 'huge': 1e20},
+    {'created_at': datetime.datetime(2026, 10, 18, 12, 30, 1, 5),
+     'due_date': datetime.date(2026, 10, 18),
+     'job_id': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    {'lazy_text': gettext_lazy('Lazy'), gettext_lazy('lazy_key'): 1},
+    {'line_separator': 'a\u2028b\u2029c', 'accents_é': 'crème brûlée'},
+    {'big_number': 2 ** 70, 1: 'int key', 2.5: 'float key', None: 'none'},
+    {'_private_key': 1, 'trailing_': 2, 'double__under': 3},
+]
+
+
+class CamelizeTests(SimpleTestCase):
+    """Test key conversion matches djangorestframework_camel_case."""
+
+    def test_camelize_matches_library(self):
+        """Test camelize gives the same data as the library."""
+        for data in SAMPLES:
+            self.assertEqual(
+                camelize(data),
+                library_util.camelize(data),
+                data
+            )
+
+    def test_camelize_ignore_options(self):
+        """Test ignored fields and keys are left as they are."""
+        data = {'keep_me': {'inner_key': 1}, 'other_key': {'inner_key': 2}}
+        options = {'ignore_fields': ('keep_me',), 'ignore_keys': ('other_key',)}
+
+        self.assertEqual(
+            camelize(data, **options),
+            library_util.camelize(data, **options)
+        )
+
+    def test_camelize_is_idempotent(self):
+        """Test camelized data is returned as it is."""
+        data = camelize({'recipe_id': 1})
+
+        self.assertIs(camelize(data), data)
+
+    def test_underscoreize_matches_library(self):
+        """Test underscoreize gives the same data as the library."""
+        samples = [
+            {'recipeId': 1, 'timeMinutes': 10, 'tags': [{'tagName': 'a'}]},
+            {'user2Fa': True, 'version12Name': 'x', 'HTTPHeader': 1},
+            ['a', {'nestedDict': {'deepKey': None}}],
+        ]
+        for data in samples:
+            for options in ({}, {'no_underscore_before_number': True}):
+                self.assertEqual(
+                    underscoreize(data, **options),
+                    library_util.underscoreize(data, **options),
+                    data
+                )
+
+    def test_underscoreize_query_dict(self):
+        """Test query dicts keep all their values."""
+        query = QueryDict('tagIds=1&tagIds=2&title=soup')
+
+        result = underscoreize(query)
+
+        self.assertIsInstance(result, QueryDict)
+        self.assertEqual(result.getlist('tag_ids'), ['1', '2'])
+        self.assertEqual(result, library_util.underscoreize(query))
+
+
+class CamelCaseJSONRendererTests(SimpleTestCase):
+    """Test the renderer writes the same bytes as the library's."""
+
+    def test_same_output_as_library(self):
+        """Test rendered data is byte for byte identical."""
+        renderer = CamelCaseJSONRenderer()
+        library_renderer = library_render.CamelCaseJSONRenderer()
+        for data in SAMPLES:
+            self.assertEqual(
+                renderer.render(data),
+                library_renderer.render(data),
+                data
+            )
+
+    def test_out_of_range_floats_rejected(self):
+        """Test NaN is refused in strict mode, as by the library."""
+        for renderer in (CamelCaseJSONRenderer(),
+                         library_render.CamelCaseJSONRenderer()):
+            with self.assertRaises(ValueError):
+                renderer.render({'not_a_number': float('nan')})
+
+    def test_same_output_indented(self):
+        """Test indented output is identical too."""
+        context = {'indent': 2}
+        data = SAMPLES[3]
+
+        self.assertEqual(
+            CamelCaseJSONRenderer().render(data, renderer_context=context),
+            library_render.CamelCaseJSONRenderer().render(
+                data, renderer_context=context
+            )
+        )
+
+    def test_renders_camelized_data(self):
+        """Test data camelized beforehand, e.g. cached, is rendered."""
+        data = {'recipe_id': 1, 'rating': 1e20}
+
+        self.assertEqual(
+            CamelCaseJSONRenderer().render(camelize(data)),
+            library_render.CamelCaseJSONRenderer().render(data)
+        )
+
+
+class CamelCaseJSONParserTests(SimpleTestCase):
+    """Test the JSON parser."""
+
+    def parse(self, content, encoding='utf-8'):
+        return CamelCaseJSONParser().parse(
+            io.BytesIO(content),
+            parser_context={'encoding': encoding}
+        )
+
+    def test_parse_camel_case(self):
+        """Test keys are converted to snake_case."""
+        data = self.parse(b'{"timeMinutes": 5, "tags": [{"tagName": "x"}]}')
+
+        self.assertEqual(data, {'time_minutes': 5, 'tags': [{'tag_name': 'x'}]})
+
+    def test_parse_other_encoding(self):
+        """Test bodies in other encodings are decoded."""
+        data = self.parse('{"title": "crème"}'.encode('latin-1'), 'latin-1')
+
+        self.assertEqual(data, {'title': 'crème'})
+
+    def test_parse_big_integer(self):
+        """Test integers orjson cannot hold are parsed."""
+        data = self.parse(b'{"bigNumber": 1180591620717411303424}')
+
+        self.assertEqual(data, {'big_number': 2 ** 70})
+
+    def test_parse_errors(self):
+        """Test invalid JSON and constants are rejected."""
+        for content in (b'{"title": ', b'{"rating": NaN}', b'\xff'):
+            with self.assertRaises(ParseError):
+                self.parse(content)
+
+
+class CamelCaseMiddlewareTests(SimpleTestCase):
+    """Test query parameter names are converted."""
+
+    def process(self, url):
+        request = RequestFactory().get(url)
+        original = request.GET
+        CamelCaseMiddleware(lambda request: None)(request)
+        return original, request.GET
+
+    def test_converts_camel_case_names(self):
+        """Test camelCase names are renamed."""
+        _, query = self.process('/api/recipe/recipes/?assignedOnly=1')
+
+        self.assertEqual(query.get('assigned_only'), '1')
+
+    def test_snake_case_query_kept(self):
+        """Test request.GET is kept when no name changes."""
+        original, query = self.process('/api/recipe/recipes/?tags=1,2')
+
+        self.assertIs(query, original)
+        self.assertFalse(needs_underscoreize(query))
+
+    async def test_async_mode(self):
+        """Test async responses are awaited without a thread."""
+        async def get_response(request):
+            return request.GET
+
+        middleware = CamelCaseMiddleware(get_response)
+        query = await middleware(RequestFactory().get('/?assignedOnly=1'))
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(query.get('assigned_only'), '1')
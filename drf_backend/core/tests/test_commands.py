@@ -1,13 +1,22 @@
 """
 Tests custom Django management commands
 """
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.db.utils import OperationalError
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from core.models import Recipe, StoredImage
+
 
 @patch('core.management.commands.wait_for_db.Command.check')
 class CommandTest(SimpleTestCase):
@@ -29,3 +38,85 @@ class CommandTest(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class SweepMediaTests(TestCase):
+    """Test deleting orphaned recipe image files."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.recipe = Recipe.objects.create(
+            user=user,
+            title='Sample recipe',
+            time_minutes=5,
+            price=Decimal('5.50'),
+            image='uploads/recipe/aa/kept.jpg',
+            image_variants=[
+                {'width': 320, 'format': 'webp',
+                 'name': 'uploads/recipe/variants/kept-320w.webp'},
+            ]
+        )
+        StoredImage.objects.create(
+            name='uploads/recipe/bb/shared.jpg',
+            ref_count=1,
+            variants=[
+                {'width': 320, 'format': 'webp',
+                 'name': 'uploads/recipe/variants/shared-320w.webp'},
+            ]
+        )
+        StoredImage.objects.create(name='uploads/recipe/cc/gone.jpg')
+
+        for name in ('aa/kept.jpg', 'variants/kept-320w.webp',
+                     'variants/shared-320w.webp', 'cc/gone.jpg',
+                     'legacy.jpg', 'variants/gone-320w.webp'):
+            self.create_file(name, age=2 * 24 * 60 * 60)
+        self.create_file('dd/recent.jpg', age=60)
+
+    def create_file(self, name, age):
+        path = os.path.join(self.media_root, 'uploads', 'recipe', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * 100)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+    def remaining_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root)
+            for name in names
+        )
+
+    def test_sweep_media(self):
+        """Test unreferenced old files are deleted."""
+        out = StringIO()
+        call_command('sweep_media', batch_size=2, stdout=out)
+
+        self.assertEqual(self.remaining_files(), [
+            'uploads/recipe/aa/kept.jpg',
+            'uploads/recipe/dd/recent.jpg',
+            'uploads/recipe/variants/kept-320w.webp',
+            'uploads/recipe/variants/shared-320w.webp',
+        ])
+        self.assertFalse(
+            StoredImage.objects.filter(name='uploads/recipe/cc/gone.jpg')
+        )
+        self.assertIn('Scanned 7 files', out.getvalue())
+        self.assertIn('3 orphaned, 3 deleted', out.getvalue())
+
+    def test_sweep_media_dry_run(self):
+        """Test a dry run only reports the orphaned files."""
+        out = StringIO()
+        call_command('sweep_media', dry_run=True, stdout=out)
+
+        self.assertEqual(len(self.remaining_files()), 7)
+        self.assertIn('Would delete uploads/recipe/legacy.jpg', out.getvalue())
+        self.assertIn('3 orphaned, 0 deleted, would free 300', out.getvalue())
@@ -0,0 +1,169 @@
+"""
+Tests for pooled database connections and their lifespan.
+"""
+from unittest.mock import patch
+
+import psycopg2
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.backends.postgresql.base import DatabaseWrapper
+from core.backends.postgresql.pool import ConnectionPool, close_pools
+from core.lifespan import with_lifespan
+
+
+class ConnectionPoolTests(TestCase):
+    """Test the connection pool."""
+
+    def setUp(self):
+        self.conn_params = connection.get_connection_params()
+
+    def create_pool(self, **kwargs):
+        options = {'max_size': 2, 'timeout': 0.1}
+        options.update(kwargs)
+        pool = ConnectionPool(**options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def connect(self):
+        return psycopg2.connect(**self.conn_params)
+
+    def test_connection_reused(self):
+        """Test a returned connection is handed out again."""
+        pool = self.create_pool()
+        conn = pool.get(self.connect)
+        pool.put(conn)
+
+        self.assertIs(pool.get(self.connect), conn)
+
+    def test_size_bounded(self):
+        """Test callers wait for a connection, then give up."""
+        pool = self.create_pool(max_size=1)
+        pool.get(self.connect)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.get(self.connect)
+
+    def test_transaction_rolled_back(self):
+        """Test open transactions are rolled back on return."""
+        pool = self.create_pool()
+        conn = pool.get(self.connect)
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        pool.put(conn)
+
+        self.assertIs(pool.get(self.connect), conn)
+        self.assertEqual(
+            conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def test_broken_connection_replaced(self):
+        """Test health checks replace connections the server closed."""
+        pool = self.create_pool(health_checks=True)
+        conn = pool.get(self.connect)
+        pool.put(conn)
+        with self.connect() as other, other.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_terminate_backend(%s)',
+                [conn.get_backend_pid()]
+            )
+
+        new_conn = pool.get(self.connect)
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+
+    def test_old_connection_closed(self):
+        """Test connections past their lifetime are not reused."""
+        pool = self.create_pool(max_lifetime=0)
+        conn = pool.get(self.connect)
+        pool.put(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.get(self.connect), conn)
+
+    def test_close(self):
+        """Test closing the pool closes idle and returned connections."""
+        pool = self.create_pool()
+        idle, in_use = pool.get(self.connect), pool.get(self.connect)
+        pool.put(idle)
+
+        pool.close()
+        pool.put(in_use)
+
+        self.assertTrue(idle.closed)
+        self.assertTrue(in_use.closed)
+
+
+class PooledDatabaseWrapperTests(TestCase):
+    """Test the database backend with a pool."""
+
+    def create_wrapper(self):
+        settings_dict = dict(
+            connection.settings_dict,
+            CONN_MAX_AGE=0,
+            POOL={'SIZE': 1, 'TIMEOUT': 1, 'MAX_LIFETIME': None}
+        )
+        wrapper = DatabaseWrapper(settings_dict)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_connections_shared(self):
+        """Test a closed connection is reused by another wrapper."""
+        wrapper = self.create_wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        conn = wrapper.connection
+        self.addCleanup(close_pools)
+        wrapper.close()
+
+        other = self.create_wrapper()
+        with other.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.assertIs(other.connection, conn)
+        self.assertFalse(conn.closed)
+
+
+class LifespanTests(SimpleTestCase):
+    """Test the ASGI lifespan events."""
+
+    async def run_lifespan(self, *events):
+        received = [{'type': f'lifespan.{event}'} for event in events]
+        sent = []
+
+        async def receive():
+            return received.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        application = with_lifespan(None)
+        await application({'type': 'lifespan'}, receive, send)
+        return sent
+
+    @patch('core.lifespan.close_connections')
+    @patch('core.lifespan.check_connections')
+    async def test_startup_and_shutdown(self, check, close):
+        """Test databases are checked on startup and closed on shutdown."""
+        sent = await self.run_lifespan('startup', 'shutdown')
+
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+        check.assert_called_once()
+        close.assert_called_once()
+
+    @patch('core.lifespan.check_connections')
+    async def test_startup_failed(self, check):
+        """Test an unreachable database fails the startup."""
+        check.side_effect = psycopg2.OperationalError('unreachable')
+
+        sent = await self.run_lifespan('startup')
+
+        self.assertEqual(
+            sent,
+            [{'type': 'lifespan.startup.failed', 'message': 'unreachable'}]
+        )
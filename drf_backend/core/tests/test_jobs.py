@@ -0,0 +1,125 @@
+"""
+Tests for background jobs and the worker command.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+calls = []
+
+
+@jobs.task('tests.echo')
+def echo(job):
+    calls.append(job.payload)
+    return job.payload
+
+
+@jobs.task('tests.fail')
+def fail(job):
+    raise ValueError('Boom')
+
+
+@override_settings(JOB_RETRY_DELAY=10)
+class JobTests(TestCase):
+    """Test enqueueing and running jobs."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_run_job(self):
+        """Test a successful job stores its result."""
+        job = jobs.enqueue('tests.echo', {'value': 1})
+
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'value': 1})
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(job.locked_until)
+
+    def test_enqueue_unknown_task(self):
+        """Test enqueueing an unregistered task raises an error."""
+        with self.assertRaises(LookupError):
+            jobs.enqueue('tests.missing')
+
+    def test_failed_job_retried_with_backoff(self):
+        """Test a failing job is rescheduled until out of attempts."""
+        job = jobs.enqueue('tests.fail', max_attempts=2)
+        before = timezone.now()
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run_pending_jobs()
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('ValueError: Boom', job.error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+        self.assertEqual(jobs.run_pending_jobs(), 0)
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run_pending_jobs()
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_future_job_not_claimed(self):
+        """Test jobs scheduled for later are not run yet."""
+        Job.objects.create(
+            name='tests.echo',
+            run_at=timezone.now() + timedelta(minutes=1)
+        )
+
+        self.assertEqual(jobs.claim_jobs(10), [])
+
+    def test_stale_running_job_reclaimed(self):
+        """Test a job left running by a dead worker is run again."""
+        job = Job.objects.create(
+            name='tests.echo',
+            status=Job.RUNNING,
+            attempts=1,
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        Job.objects.create(
+            name='tests.echo',
+            status=Job.RUNNING,
+            attempts=1,
+            locked_until=timezone.now() + timedelta(minutes=1)
+        )
+
+        claimed = jobs.claim_jobs(10)
+
+        self.assertEqual([j.id for j in claimed], [job.id])
+        self.assertEqual(claimed[0].attempts, 2)
+
+
+class WorkerCommandTests(TransactionTestCase):
+    """Test the worker command, whose threads use their own connections."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_burst(self):
+        """Test a burst worker runs all due jobs and exits."""
+        for value in range(5):
+            jobs.enqueue('tests.echo', {'value': value})
+        out = StringIO()
+
+        call_command('worker', burst=True, concurrency=3, stdout=out)
+
+        self.assertEqual(
+            sorted(call['value'] for call in calls),
+            [0, 1, 2, 3, 4]
+        )
+        self.assertEqual(
+            Job.objects.filter(status=Job.SUCCEEDED).count(), 5
+        )
+        self.assertIn('Worker stopped.', out.getvalue())
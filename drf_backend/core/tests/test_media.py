@@ -0,0 +1,169 @@
+"""
+Tests for serving media files.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+IMAGE_NAME = 'uploads/recipe/ab/image.jpg'
+CONTENT = bytes(range(256)) * 4
+
+
+def media_url(name):
+    return reverse('media', args=[name])
+
+
+class ServeMediaTests(SimpleTestCase):
+    """Test the media view."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        for name in (IMAGE_NAME, 'private/secret.txt'):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(CONTENT)
+
+    def test_serve_file(self):
+        """Test a public file is sent with validators."""
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertIn('public', res['Cache-Control'])
+
+    def test_head_request(self):
+        """Test HEAD requests are answered without the file."""
+        res = self.client.head(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Length'], str(len(CONTENT)))
+
+    def test_post_not_allowed(self):
+        """Test only safe methods are allowed."""
+        res = self.client.post(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, 405)
+
+    def test_missing_and_private_files(self):
+        """Test missing, private and escaping paths are not found."""
+        for name in ('uploads/recipe/missing.jpg', 'private/secret.txt',
+                     'uploads/recipe/../../private/secret.txt',
+                     'uploads/recipe/ab/image.jpg/x'):
+            res = self.client.get(media_url(name))
+            self.assertEqual(res.status_code, 404, name)
+
+    def test_directories_not_found(self):
+        """Test directories are neither sent nor handed to the proxy."""
+        for mode in ('python', 'accel', 'sendfile'):
+            with override_settings(MEDIA_SERVE_MODE=mode):
+                res = self.client.get(media_url('uploads/recipe/ab'))
+
+            self.assertEqual(res.status_code, 404, mode)
+            self.assertNotIn('X-Accel-Redirect', res)
+            self.assertNotIn('X-Sendfile', res)
+
+    def test_if_none_match(self):
+        """Test a matching ETag is answered with 304."""
+        etag = self.client.get(media_url(IMAGE_NAME))['ETag']
+
+        res = self.client.get(media_url(IMAGE_NAME), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_if_modified_since(self):
+        """Test an unchanged file is answered with 304."""
+        last_modified = self.client.get(media_url(IMAGE_NAME))['Last-Modified']
+
+        res = self.client.get(
+            media_url(IMAGE_NAME),
+            HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_byte_ranges(self):
+        """Test single byte ranges are answered with 206."""
+        size = len(CONTENT)
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=1000-': (1000, size - 1),
+            'bytes=-24': (size - 24, size - 1),
+            'bytes=10-99999': (10, size - 1),
+        }
+        for header, (start, end) in cases.items():
+            res = self.client.get(media_url(IMAGE_NAME), HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code, 206, header)
+            self.assertEqual(
+                b''.join(res.streaming_content),
+                CONTENT[start:end + 1]
+            )
+            self.assertEqual(res['Content-Range'], f'bytes {start}-{end}/{size}')
+            self.assertEqual(res['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        """Test ranges past the end of the file are answered with 416."""
+        res = self.client.get(media_url(IMAGE_NAME), HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_multiple_ranges_ignored(self):
+        """Test multi-range requests get the whole file."""
+        res = self.client.get(media_url(IMAGE_NAME), HTTP_RANGE='bytes=0-1,5-6')
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_if_range(self):
+        """Test ranges only apply while If-Range matches."""
+        etag = self.client.get(media_url(IMAGE_NAME))['ETag']
+
+        res = self.client.get(
+            media_url(IMAGE_NAME),
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(res.status_code, 206)
+
+        res = self.client.get(
+            media_url(IMAGE_NAME),
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"outdated"'
+        )
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(MEDIA_SERVE_MODE='accel')
+    def test_accel_redirect(self):
+        """Test nginx is told to send the file."""
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected-media/{IMAGE_NAME}')
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+
+    @override_settings(MEDIA_SERVE_MODE='sendfile')
+    def test_sendfile(self):
+        """Test the front server is told the file path."""
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.join(self.media_root, IMAGE_NAME)
+        )
+        self.assertEqual(res.content, b'')
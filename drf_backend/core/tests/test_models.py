@@ -85,6 +85,27 @@ class ModelTest(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
+    def test_recipe_search_vector_maintained(self):
+        """Test the recipe search vector follows title changes."""
+        user = create_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Lemon cake',
+            time_minutes=5,
+            price=Decimal('10.00'),
+        )
+        recipes = models.Recipe.objects.filter(search_vector='lemon')
+        self.assertIn(recipe, recipes)
+
+        recipe.title = 'Orange cake'
+        recipe.save()
+
+        self.assertNotIn(recipe, recipes.all())
+        self.assertIn(
+            recipe,
+            models.Recipe.objects.filter(search_vector='orange')
+        )
+
     def test_create_tag(self):
         """Test creating a tag is successful."""
         user = create_user()
@@ -111,4 +132,11 @@ class ModelTest(TestCase):
         mock_uuid.return_value = uuid
         file_path = models.recipe_image_file_path(None, 'image.jpg')
 
-        self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
+        self.assertEqual(file_path, f'uploads/recipe/te/{uuid}.jpg')
+
+    def test_recipe_file_name_content_digest(self):
+        """Test images named by their digest keep that name."""
+        digest = 'ab' + '0' * 62
+        file_path = models.recipe_image_file_path(None, f'{digest}.JPG')
+
+        self.assertEqual(file_path, f'uploads/recipe/ab/{digest}.jpg')
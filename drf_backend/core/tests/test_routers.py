@@ -0,0 +1,225 @@
+"""
+Tests for routing reads to database replicas.
+
+The end to end tests need a replica alias, which mirrors the primary's
+test database, and a shared cache, e.g. DB_REPLICA_HOSTS=localhost
+CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+CACHE_LOCATION=/tmp/django_cache.
+"""
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+from core.routers import (ReplicaRouter, is_pinned, request_routing,
+                          user_key)
+from user.authentication import token_user_cache
+
+REPLICAS = ['replica1', 'replica2']
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the database router."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test reads of jobs and commands are not routed."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_request_reads_use_replicas(self):
+        """Test reads of safe requests go to a replica."""
+        with request_routing(use_replicas=True):
+            self.assertIn(self.router.db_for_read(Recipe), REPLICAS)
+
+        with request_routing(use_replicas=False):
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_request_reads_use_one_replica(self):
+        """Test all reads of a request go to the same replica."""
+        with request_routing(use_replicas=True) as routing:
+            databases = {self.router.db_for_read(Recipe) for _ in range(20)}
+
+        self.assertEqual(databases, {routing.replica})
+
+    def test_reads_after_write_use_primary(self):
+        """Test a request reads its own writes."""
+        with request_routing(use_replicas=True) as routing:
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+            self.assertTrue(routing.wrote)
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_reads_in_transactions_use_primary(self):
+        """Test reads within a transaction see its uncommitted data."""
+        with request_routing(use_replicas=True), mock.patch.object(
+            connections['default'], 'in_atomic_block', True
+        ):
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_credentials_read_from_primary(self):
+        """Test tokens are read from the primary."""
+        with request_routing(use_replicas=True):
+            self.assertIsNone(self.router.db_for_read(Token))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test reads use the primary if no replica is configured."""
+        with request_routing(use_replicas=True):
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test requests are routed and clients pinned after writes."""
+
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def request(self, method='get', write=False, token='abc', user=None):
+        """Send a request, returning where its read went."""
+        databases = []
+
+        def get_response(request):
+            if write:
+                self.router.db_for_write(Recipe)
+            databases.append(self.router.db_for_read(Recipe))
+            return HttpResponse()
+
+        request = getattr(self.factory, method)(
+            '/api/recipe/recipes/',
+            HTTP_AUTHORIZATION=f'Token {token}'
+        )
+        if user is not None:
+            request.user = user
+        ReplicaRoutingMiddleware(get_response)(request)
+        return databases[0]
+
+    def test_safe_requests_read_from_replicas(self):
+        """Test reads of safe requests go to a replica."""
+        self.assertIn(self.request(), REPLICAS)
+        self.assertIn(self.request('head'), REPLICAS)
+
+    def test_unsafe_requests_read_from_primary(self):
+        """Test reads of unsafe requests go to the primary."""
+        self.assertIsNone(self.request('post'))
+
+    def test_client_pinned_after_write(self):
+        """Test a client reads from the primary after writing."""
+        self.request('post', write=True)
+
+        self.assertIsNone(self.request())
+        self.assertIn(self.request(token='other'), REPLICAS)
+
+        cache.clear()
+        self.assertIn(self.request(), REPLICAS)
+
+    def test_user_pinned_after_write(self):
+        """Test the user of a client that wrote is pinned as well."""
+        user = get_user_model()(id=1, email='user@example.com')
+        self.request('post', write=True, user=user)
+
+        self.assertTrue(is_pinned(user_key(user.id)))
+        self.assertFalse(is_pinned(user_key(2)))
+
+    async def test_async_requests(self):
+        """Test routing follows async requests into threads."""
+        databases = []
+
+        async def get_response(request):
+            databases.append(
+                await sync_to_async(self.router.db_for_read)(Recipe)
+            )
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        await middleware(self.factory.get('/api/recipe/recipes/'))
+
+        self.assertIn(databases[0], REPLICAS)
+
+
+@skipUnless('replica1' in settings.DATABASES, 'No replica configured.')
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaEndToEndTests(TransactionTestCase):
+    """Test which database serves the API's reads."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        token_user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def create_recipe(self):
+        """Create a recipe through the API."""
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Soup',
+            'time_minutes': 10,
+            'price': Decimal('5.00'),
+        })
+        self.assertEqual(res.status_code, 201)
+
+    def list_recipes(self, client):
+        """List recipes, returning the response and the databases that
+           recipes were read from."""
+        queries = {
+            alias: CaptureQueriesContext(connections[alias])
+            for alias in ('default', 'replica1')
+        }
+        with queries['default'], queries['replica1']:
+            res = client.get(RECIPES_URL)
+        databases = {
+            alias for alias, context in queries.items()
+            if any('"core_recipe"' in query['sql']
+                   for query in context.captured_queries)
+        }
+        return res, databases
+
+    def test_read_your_writes(self):
+        """Test a client reads from the primary until it is unpinned."""
+        self.create_recipe()
+
+        res, databases = self.list_recipes(self.client)
+        self.assertEqual([r['title'] for r in res.data], ['Soup'])
+        self.assertEqual(databases, {'default'})
+
+        cache.clear()
+        res, databases = self.list_recipes(self.client)
+        self.assertEqual([r['title'] for r in res.data], ['Soup'])
+        self.assertEqual(databases, {'replica1'})
+
+    def test_stale_list_not_cached_for_other_clients(self):
+        """Test a list read from a replica by another client of a user
+           who just wrote is not cached for the client that wrote."""
+        other = APIClient()
+        other.force_authenticate(self.user)
+        self.create_recipe()
+
+        res, databases = self.list_recipes(other)
+        self.assertEqual(databases, {'replica1'})
+
+        res, databases = self.list_recipes(self.client)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(databases, {'default'})
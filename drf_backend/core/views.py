@@ -1,3 +1,149 @@
-from django.shortcuts import render
+"""
+Views serving uploaded media files.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from stat import S_ISREG
+from urllib.parse import quote
 
-# Create your views here.
+from django.conf import settings
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from core.storage import recipe_image_storage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def has_media_permission(request, name):
+    """Return whether the request may read the media file.
+
+    Recipe images are loaded by <img> tags, which send no credentials,
+    so only files under MEDIA_PUBLIC_PREFIXES are served."""
+    return name.startswith(tuple(settings.MEDIA_PUBLIC_PREFIXES))
+
+
+def _parse_range(header, size):
+    """Return the (start, end) of a single byte range, None if the header
+       is to be ignored, or False if it cannot be satisfied."""
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None or not any(match.groups()):
+        # Malformed and multi-range headers are ignored, which RFC 9110
+        # allows; the whole file is sent instead.
+        return None
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(file, start, end):
+    """Yield a byte range of a file in chunks, then close it."""
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _range_applies(request, etag, last_modified):
+    """Return whether an If-Range header, if any, still matches."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _file_response(request, path, stat, content_type, etag):
+    """Send the file from Python, honouring byte ranges."""
+    size = stat.st_size
+    header = request.META.get('HTTP_RANGE')
+    byte_range = None
+    if header and _range_applies(request, etag, stat.st_mtime):
+        byte_range = _parse_range(header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return FileResponse(open(path, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        _read_range(open(path, 'rb'), start, end),
+        status=206,
+        content_type=content_type
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded media file after checking access in Django.
+
+    With MEDIA_SERVE_MODE 'accel' (nginx) or 'sendfile' (Apache,
+    lighttpd) the transfer is handed to the front proxy, which also
+    handles ranges and conditional requests; 'python' sends the file
+    from this process."""
+    name = posixpath.normpath(path).lstrip('/')
+    if (name.startswith('..') or name != path
+            or not has_media_permission(request, name)):
+        raise Http404
+    file_path = recipe_image_storage.path(name)
+    try:
+        stat = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not S_ISREG(stat.st_mode):
+        raise Http404
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    etag = quote_etag(f'{stat.st_size:x}-{int(stat.st_mtime):x}')
+    if settings.MEDIA_SERVE_MODE == 'accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(name)
+        )
+    elif settings.MEDIA_SERVE_MODE == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = file_path
+    else:
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(stat.st_mtime)
+        ) or _file_response(request, file_path, stat, content_type, etag)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.MEDIA_CACHE_MAX_AGE
+    )
+    return response
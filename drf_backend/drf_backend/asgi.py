@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'drf_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.lifespan import with_lifespan  # noqa: E402
+
+application = with_lifespan(django_application)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
 from django.template.context_processors import media, static
 from dotenv import load_dotenv
 
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'rest_framework.authtoken',
@@ -52,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,7 +62,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'djangorestframework_camel_case.middleware.CamelCaseMiddleWare',
+    'core.middleware.CamelCaseMiddleware',
 ]
 
 ROOT_URLCONF = 'drf_backend.urls'
@@ -86,16 +89,99 @@ WSGI_APPLICATION = 'drf_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked
+# before reuse. With DB_POOL_SIZE set, each process shares a pool of at
+# most that many connections between its threads instead, waiting up to
+# DB_POOL_TIMEOUT seconds for a free one.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
-        'HOST': os.environ.get('DB_HOST')
+        'HOST': os.environ.get('DB_HOST'),
+        # Pooled connections go back to the pool after every request.
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'OPTIONS': {
+            'connect_timeout': DB_CONNECT_TIMEOUT,
+        },
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'TIMEOUT': DB_POOL_TIMEOUT,
+            'MAX_LIFETIME': DB_CONN_MAX_AGE,
+        },
+    }
+}
+
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica-1,replica-2. Setting
+# DB_REPLICA_NAME lets a separate local database stand in for them.
+DATABASE_REPLICAS = []
+DB_REPLICA_HOSTS = os.environ.get('DB_REPLICA_HOSTS', '')
+for index, host in enumerate(filter(None, DB_REPLICA_HOSTS.split(',')), 1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'NAME': os.environ.get('DB_REPLICA_NAME', os.environ.get('DB_NAME')),
+        # In tests the replicas mirror the primary's test database.
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+# Pins must be seen by every process, so this cache has to be shared.
+DB_REPLICA_PIN_CACHE_ALIAS = 'default'
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+if DATABASE_REPLICAS and CACHES[DB_REPLICA_PIN_CACHE_ALIAS]['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        'Read replicas need a CACHE_BACKEND shared by all processes, so '
+        'clients that wrote keep reading from the primary everywhere.'
+    )
+
+# Cache used for per-user recipe, tag and ingredient list responses.
+# Local memory is per process, so deployments running several workers
+# need a shared backend for invalidations to reach all of them.
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 300))
+
+# Cached token authentication: in-process LRU size and entry lifetime in
+# seconds, optionally backed by a shared cache alias.
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60))
+TOKEN_AUTH_CACHE_ALIAS = os.environ.get('TOKEN_AUTH_CACHE_ALIAS')
+
+# Login token mode: 'db' issues permanent database tokens, 'signed' issues
+# short-lived signed access tokens plus database refresh tokens.
+AUTH_TOKEN_MODE = os.environ.get('AUTH_TOKEN_MODE', 'db')
+# Token lifetimes in seconds.
+ACCESS_TOKEN_LIFETIME = int(os.environ.get('ACCESS_TOKEN_LIFETIME', 300))
+REFRESH_TOKEN_LIFETIME = int(
+    os.environ.get('REFRESH_TOKEN_LIFETIME', 60 * 60 * 24 * 14)
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -134,6 +220,42 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# How core.views.serve_media sends files: 'python' streams them from the
+# worker, 'accel' hands them to nginx with X-Accel-Redirect to an internal
+# location aliased to MEDIA_ROOT, 'sendfile' sets X-Sendfile for Apache or
+# lighttpd.
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'python')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/'
+)
+# Media paths anyone may read; everything else is answered with 404.
+MEDIA_PUBLIC_PREFIXES = ('uploads/recipe/',)
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24))
+
+# Widths of the resized WebP and JPEG copies made of every recipe image.
+RECIPE_IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+# Upload limits, checked from the image header before anything is decoded.
+# 50 megapixels cover current phone cameras and decode to about 150 MB.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 20 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 50_000_000)
+)
+# Uploaded files larger than this are streamed to a temporary file
+# instead of being held in memory.
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(
+    os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', 1024 * 1024)
+)
+
+# Background jobs: worker threads per `manage.py worker` process, seconds
+# between polls of an empty queue, seconds before a job left running by a
+# dead worker is retried, and the base of the exponential retry delay.
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 2))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT', 600))
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 10))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -144,13 +266,13 @@ AUTH_USER_MODEL = 'core.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_RENDERER_CLASSES': (
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
+        'core.renderers.CamelCaseJSONRenderer',
         'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer'
     ),
     'DEFAULT_PARSER_CLASSES': (
         'djangorestframework_camel_case.parser.CamelCaseFormParser',
         'djangorestframework_camel_case.parser.CamelCaseMultiPartParser',
-        'djangorestframework_camel_case.parser.CamelCaseJSONParser',
+        'core.parsers.CamelCaseJSONParser',
     ),
 }
 
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        """Connect cache invalidation signal handlers and register
+           background tasks."""
+        from recipe import signals, tasks  # noqa: F401
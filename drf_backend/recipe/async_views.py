@@ -0,0 +1,113 @@
+"""
+Async read views for the recipe APIs.
+
+DRF views are synchronous, so under ASGI Django runs each of their
+requests in a thread. The views here serve the list and retrieve
+actions of the recipe viewsets as native async views instead: the
+request is authenticated, checked and negotiated by the viewset as
+usual, then its async handler queries through Django's async ORM.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SynchronousOnlyOperation, ValidationError
+from django.http import Http404
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+
+async def authenticate(request):
+    """Authenticate a DRF request the way request.user does.
+
+    Authenticators run in the event loop, which suffices for signed and
+    cached tokens. Django refuses queries there, so credentials that
+    have to be looked up are authenticated again in a thread."""
+    for authenticator in request.authenticators:
+        try:
+            try:
+                user_auth = authenticator.authenticate(request)
+            except SynchronousOnlyOperation:
+                user_auth = await sync_to_async(
+                    authenticator.authenticate
+                )(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+
+        if user_auth is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth
+            return
+
+    request._not_authenticated()
+
+
+class AsyncListModelMixin:
+    """Async counterpart of ListModelMixin.list."""
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = await sync_to_async(self.paginate_queryset)(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(
+            [instance async for instance in queryset],
+            many=True
+        )
+        return Response(serializer.data)
+
+
+class AsyncRetrieveModelMixin:
+    """Async counterpart of RetrieveModelMixin.retrieve."""
+
+    async def aget_object(self):
+        """Return the object the view is displaying, like get_object."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError,
+                ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+
+class AsyncViewSetView(View):
+    """Serve a read action of a viewset from an async view.
+
+    The viewset must implement the action as a coroutine named after
+    it with an `a` prefix, e.g. alist for list."""
+    http_method_names = ['get', 'head', 'options']
+    viewset_class = None
+    action = None
+
+    async def get(self, request, *args, **kwargs):
+        view = self.viewset_class()
+        view.action_map = {'get': self.action, 'head': self.action}
+        view.args = args
+        view.kwargs = kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            await authenticate(view.request)
+            view.initial(view.request, *args, **kwargs)
+            handler = getattr(view, f'a{self.action}')
+            response = await handler(view.request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        return view.finalize_response(view.request, response, *args, **kwargs)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        # Django 4.1.1 returns the response itself even from async views.
+        return super().http_method_not_allowed(request, *args, **kwargs)
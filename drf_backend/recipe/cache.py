@@ -0,0 +1,154 @@
+"""
+Per-user caching of recipe API list responses.
+
+Every user has a cache version. List responses are stored under a key
+containing that version, so bumping it on any change to the user's
+recipes, tags or ingredients invalidates all of their cached lists.
+"""
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date
+from djangorestframework_camel_case.settings import api_settings
+from rest_framework.response import Response
+
+from core.camelcase import camelize
+from core.routers import is_pinned, read_from_replica, user_key
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def get_cache():
+    """Return the cache backend used for API responses."""
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_stats():
+    """Return hit, miss and invalidation counters of this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _version_key(user_id):
+    return f'api-cache:{user_id}:version'
+
+
+def _new_version():
+    # Versions are never reused, so an evicted version key cannot make
+    # stale responses reachable again.
+    return time.time_ns()
+
+
+def _get_version(user_id):
+    cache = get_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = _new_version()
+        cache.set(_version_key(user_id), version, None)
+    return version
+
+
+def _bump_version(user_id):
+    _count('invalidations')
+    get_cache().set(_version_key(user_id), _new_version(), None)
+
+
+def invalidate_user_cache(user_id):
+    """Invalidate every cached list response of the user.
+
+    The version is bumped right away and again once the transaction
+    commits, so a response cached from not yet committed data by a
+    concurrent request is never served."""
+    _bump_version(user_id)
+    transaction.on_commit(lambda: _bump_version(user_id))
+
+
+def list_cache_key(request):
+    """Return the cache key of a list response for the request."""
+    user_id = request.user.id
+    url = hashlib.md5(
+        request.build_absolute_uri().encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'api-cache:{user_id}:{_get_version(user_id)}:{url}'
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user cache.
+
+    Validator headers of the response are cached with its data, so
+    conditional requests are answered from the cache as well."""
+    cached_headers = ('ETag', 'Last-Modified')
+
+    def _cached_list(self, request):
+        """Return the cache key and the cached response, if any."""
+        key = list_cache_key(request)
+        cached = get_cache().get(key)
+        if cached is None:
+            _count('misses')
+            return key, None
+
+        _count('hits')
+        data, headers = cached
+        last_modified = headers.get('Last-Modified')
+        response = get_conditional_response(
+            request,
+            etag=headers.get('ETag'),
+            last_modified=last_modified and parse_http_date(last_modified)
+        ) or Response(data)
+        for header, value in headers.items():
+            response[header] = value
+        response['X-Cache'] = 'HIT'
+        return key, response
+
+    def _cache_list(self, key, response):
+        """Store a computed list response.
+
+        Right after a user wrote, responses read from a replica may be
+        stale and are not stored, since clients that wrote read from
+        the primary but still share the user's cache."""
+        stale = (read_from_replica()
+                 and is_pinned(user_key(self.request.user.id)))
+        if response.status_code == 200 and not stale:
+            headers = {
+                header: response[header]
+                for header in self.cached_headers
+                if response.has_header(header)
+            }
+            # Cached camelized, so hits are not walked again on rendering.
+            data = camelize(response.data, **api_settings.JSON_UNDERSCOREIZE)
+            get_cache().set(
+                key,
+                (data, headers),
+                settings.API_CACHE_TIMEOUT
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Return the cached list response, computing it on a miss."""
+        key, response = self._cached_list(request)
+        if response is not None:
+            return response
+        return self._cache_list(key, super().list(request, *args, **kwargs))
+
+    async def alist(self, request, *args, **kwargs):
+        """Async counterpart of list. Django caches are synchronous, so
+           they are read and written in a thread."""
+        key, response = await sync_to_async(self._cached_list)(request)
+        if response is not None:
+            return response
+        response = await super().alist(request, *args, **kwargs)
+        return await sync_to_async(self._cache_list)(key, response)
@@ -0,0 +1,118 @@
+"""
+Conditional GET support for the recipe APIs.
+"""
+import hashlib
+from calendar import timegm
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+LIST_METADATA = {'count': Count('id'), 'last_modified': Max('updated_at')}
+
+
+def _make_etag(*parts):
+    value = ':'.join(str(part) for part in parts)
+    return quote_etag(
+        hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+    )
+
+
+class ConditionalGetMixin:
+    """Answer If-None-Match and If-Modified-Since from recipe
+       modification times, before anything is serialized."""
+
+    def _metadata_queryset(self):
+        """Return the filtered queryset without prefetching or ordering."""
+        return self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None).order_by()
+
+    @staticmethod
+    def _tag_response(response, etag, last_modified=None):
+        """Add the validators to a successful response."""
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    @staticmethod
+    def _list_etag(request, metadata):
+        last_modified = metadata['last_modified']
+        # Deletions do not advance the last modification time,
+        # so the list is validated by its ETag only.
+        return _make_etag(
+            request.user.id,
+            request.get_full_path(),
+            metadata['count'],
+            last_modified.isoformat() if last_modified else ''
+        )
+
+    def _retrieve_validators(self, updated_at):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            _make_etag(self.kwargs[lookup_url_kwarg], updated_at.isoformat()),
+            timegm(updated_at.utctimetuple())
+        )
+
+    def _updated_at_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self._metadata_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookups are not found, as in get_object_or_404.
+            raise Http404
+        return queryset.values_list('updated_at', flat=True)
+
+    def list(self, request, *args, **kwargs):
+        """Return the list, or 304 if nothing in it has changed."""
+        metadata = self._metadata_queryset().aggregate(**LIST_METADATA)
+        etag = self._list_etag(request, metadata)
+        return get_conditional_response(
+            request, etag=etag
+        ) or self._tag_response(super().list(request, *args, **kwargs), etag)
+
+    async def alist(self, request, *args, **kwargs):
+        """Async counterpart of list."""
+        metadata = await self._metadata_queryset().aaggregate(
+            **LIST_METADATA
+        )
+        etag = self._list_etag(request, metadata)
+        return get_conditional_response(
+            request, etag=etag
+        ) or self._tag_response(
+            await super().alist(request, *args, **kwargs), etag
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the object, or 304 if it has not changed."""
+        updated_at = self._updated_at_queryset().first()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag, last_modified = self._retrieve_validators(updated_at)
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        ) or self._tag_response(
+            super().retrieve(request, *args, **kwargs), etag, last_modified
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """Async counterpart of retrieve."""
+        updated_at = await self._updated_at_queryset().afirst()
+        if updated_at is None:
+            return await super().aretrieve(request, *args, **kwargs)
+
+        etag, last_modified = self._retrieve_validators(updated_at)
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        ) or self._tag_response(
+            await super().aretrieve(request, *args, **kwargs),
+            etag,
+            last_modified
+        )
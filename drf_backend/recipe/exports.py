@@ -0,0 +1,47 @@
+"""
+Streaming exports of recipes.
+"""
+import csv
+import json
+
+from djangorestframework_camel_case.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.camelcase import camelize
+from recipe.serializers import RecipeDetailSerializer
+
+CSV_FIELDS = ('id', 'title', 'description', 'time_minutes', 'price',
+              'link', 'image', 'tags', 'ingredients')
+
+
+class Echo:
+    """File-like object that returns written values instead of storing them."""
+
+    def write(self, value):
+        return value
+
+
+def recipes_to_ndjson(recipes, context=None):
+    """Yield each recipe as one line of camelCase JSON."""
+    for recipe in recipes:
+        data = RecipeDetailSerializer(recipe, context=context).data
+        line = json.dumps(
+            camelize(data, **api_settings.JSON_UNDERSCOREIZE),
+            cls=JSONEncoder,
+            ensure_ascii=False
+        )
+        yield f'{line}\n'
+
+
+def recipes_to_csv(recipes, context=None):
+    """Yield a CSV header row followed by one row per recipe.
+       Tag and ingredient names are joined with semicolons."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for recipe in recipes:
+        data = RecipeDetailSerializer(recipe, context=context).data
+        data['tags'] = ';'.join(tag['name'] for tag in data['tags'])
+        data['ingredients'] = ';'.join(
+            ingredient['name'] for ingredient in data['ingredients']
+        )
+        yield writer.writerow(data[field] for field in CSV_FIELDS)
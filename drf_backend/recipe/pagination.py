@@ -0,0 +1,32 @@
+"""
+Pagination classes for the recipe APIs.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """Cursor pagination applied only when the client asks for it.
+
+    Requests without `page_size` or `cursor` query params get the full,
+    unpaginated list, so existing clients keep working unchanged.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate only if a page size or cursor was requested."""
+        if (self.page_size_query_param not in request.query_params
+                and self.cursor_query_param not in request.query_params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class RecipeCursorPagination(OptInCursorPagination):
+    """Cursor pagination for recipes, newest first."""
+    ordering = ('-id',)
+
+
+class RecipeAttributeCursorPagination(OptInCursorPagination):
+    """Cursor pagination for tags and ingredients."""
+    ordering = ('-name', 'id')
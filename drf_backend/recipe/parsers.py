@@ -0,0 +1,33 @@
+"""
+Parsers for the recipe APIs.
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from djangorestframework_camel_case.settings import api_settings
+
+from core.camelcase import underscoreize
+
+
+class CamelCaseNDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list of snake_case objects."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Return one item per non-empty line of the body."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        items = []
+        for line_number, line in enumerate(stream, start=1):
+            try:
+                line = line.decode(encoding).strip()
+                if line:
+                    items.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(
+                    f'NDJSON parse error on line {line_number} - {exc}'
+                )
+        return underscoreize(items, **api_settings.JSON_UNDERSCOREIZE)
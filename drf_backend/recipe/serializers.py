@@ -1,59 +1,206 @@
 """
 Serializers for the recipe API.
 """
+from django.db import connection
+from django.db.models import prefetch_related_objects
+from django.db.models.functions import Lower
 from rest_framework import serializers
 
-from core.models import Recipe, Tag, Ingredient
+from core.images import (InvalidImage, acquire_image, content_name,
+                         inspect_image, release_image)
+from core.storage import recipe_image_storage
+from core.models import Job, Recipe, Tag, Ingredient
+from recipe.cache import invalidate_user_cache
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+def lower_names(names):
+    """Return the names keyed to their lowercase in the database.
+
+    Python lowercases some letters, e.g. 'İ', differently from
+    PostgreSQL, so names that are not ASCII are lowercased by it."""
+    names = list(names)
+    if all(name.isascii() for name in names):
+        return {name: name.lower() for name in names}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name, lower(name) FROM unnest(%s::text[]) AS name',
+            [names]
+        )
+        return dict(cursor.fetchall())
+
+
+class RecipeAttributeSerializer(serializers.ModelSerializer):
+    """Base serializer for tags and ingredients."""
+    # Only present when the list view annotates it; left out otherwise.
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    def validate_name(self, value):
+        """Reject renaming to a name the user already has, ignoring case.
+
+        Nested usage in RecipeSerializer never has an instance here,
+        since existing names are reused there instead."""
+        if self.instance is not None:
+            duplicate = type(self.instance).objects.filter(
+                user=self.instance.user,
+                name__iexact=value
+            ).exclude(id=self.instance.id)
+            if duplicate.exists():
+                raise serializers.ValidationError(
+                    'An item with this name already exists.'
+                )
+        return value
+
+
+class IngredientSerializer(RecipeAttributeSerializer):
     """Serializer for ingredients."""
 
     class Meta:
         model = Ingredient
-        fields = ('id', 'name')
+        fields = ('id', 'name', 'recipe_count')
         read_only_fields = ('id',)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(RecipeAttributeSerializer):
     """Serializer for tag objects"""
 
     class Meta:
         model = Tag
-        fields = ('id', 'name')
+        fields = ('id', 'name', 'recipe_count')
         read_only_fields = ('id',)
 
 
+class RecipeImageField(serializers.ImageField):
+    """Image field validating uploads from their header only.
+
+    The stock field has Pillow verify the whole file in the request
+    process; this one enforces byte and pixel limits without decoding,
+    leaving the decode to the background job."""
+
+    def to_internal_value(self, data):
+        file = serializers.FileField.to_internal_value(self, data)
+        try:
+            image_format, _, _ = inspect_image(file)
+        except InvalidImage as exc:
+            raise serializers.ValidationError(str(exc))
+        file.name = content_name(file, image_format)
+        return file
+
+
+class ImageVariantSerializer(serializers.Serializer):
+    """Serializer for resized copies of a recipe image."""
+    width = serializers.IntegerField(read_only=True)
+    format = serializers.CharField(read_only=True)
+    url = serializers.SerializerMethodField()
+
+    def get_url(self, variant) -> str:
+        """Return the variant URL, absolute if the request is known."""
+        url = recipe_image_storage.url(variant['name'])
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer for creating many recipes at once."""
+    bulk_batch_size = 1000
+
+    def create(self, validated_data):
+        """Create recipes with bulk inserts, resolving the tags and
+           ingredients of all of them in a single pass."""
+        related = {
+            field_name: [attrs.pop(field_name, []) for attrs in validated_data]
+            for field_name in ('tags', 'ingredients')
+        }
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(**attrs) for attrs in validated_data],
+            batch_size=self.bulk_batch_size
+        )
+
+        for field_name, model in (('tags', Tag), ('ingredients', Ingredient)):
+            objs = self.child._get_or_create_attributes(
+                model,
+                [item for items in related[field_name] for item in items]
+            )
+            through = getattr(Recipe, field_name).through
+            fk_name = f'{model._meta.model_name}_id'
+            rows = {
+                (recipe.id, objs[item['name']].id)
+                for recipe, items in zip(recipes, related[field_name])
+                for item in items
+                if item['name'] in objs
+            }
+            through.objects.bulk_create(
+                [through(recipe_id=recipe_id, **{fk_name: obj_id})
+                 for recipe_id, obj_id in rows],
+                batch_size=self.bulk_batch_size
+            )
+
+        # Bulk inserts send no signals, so invalidate explicitly.
+        for user_id in {recipe.user_id for recipe in recipes}:
+            invalidate_user_cache(user_id)
+
+        prefetch_related_objects(recipes, 'tags', 'ingredients')
+        return recipes
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for the recipe model."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_variants = ImageVariantSerializer(many=True, read_only=True)
 
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'time_minutes', 'price',
-                  'tags', 'ingredients', 'image')
-        read_only_fields = ('id',)
+                  'tags', 'ingredients', 'image', 'image_variants')
+        # Images are only uploaded through RecipeImageSerializer.
+        read_only_fields = ('id', 'image')
+        list_serializer_class = RecipeListSerializer
+
+    def _get_or_create_attributes(self, model, attributes):
+        """Return tags or ingredients for the given names, keyed by
+           name, matching existing ones case-insensitively and creating
+           the rest in a single insert."""
+        # Background jobs pass the user directly, as there is no request.
+        auth_user = self.context.get('user') or self.context['request'].user
+        keys = lower_names({attribute['name'] for attribute in attributes})
+        names = {}
+        for attribute in attributes:
+            names.setdefault(keys[attribute['name']], attribute['name'])
+        if not names:
+            return {}
+
+        def fetch(lower_names):
+            return {
+                obj.lower_name: obj
+                for obj in model.objects.annotate(
+                    lower_name=Lower('name')
+                ).filter(user=auth_user, lower_name__in=lower_names)
+            }
+
+        objs = fetch(list(names))
+        missing = {key: name for key, name in names.items()
+                   if key not in objs}
+        if missing:
+            # Conflicts mean a concurrent request created the same name.
+            model.objects.bulk_create(
+                [model(user=auth_user, name=name)
+                 for name in missing.values()],
+                ignore_conflicts=True
+            )
+            objs.update(fetch(list(missing)))
+        return {name: objs[key] for name, key in keys.items() if key in objs}
 
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed."""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag
-            )
-            recipe.tags.add(tag_obj)
+        recipe.tags.add(*self._get_or_create_attributes(Tag, tags).values())
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        recipe.ingredients.add(
+            *self._get_or_create_attributes(Ingredient, ingredients).values()
+        )
 
     def create(self, validated_data):
         """Create a new recipe."""
@@ -68,12 +215,15 @@ class RecipeSerializer(serializers.ModelSerializer):
         """Update a recipe."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
+        # set() only deletes and inserts the through rows that changed.
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(
+                self._get_or_create_attributes(Tag, tags).values()
+            )
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(
+                self._get_or_create_attributes(Ingredient, ingredients).values()
+            )
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
@@ -90,10 +240,41 @@ class RecipeDetailSerializer(RecipeSerializer):
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to recipes."""
+    # This serializer handles only uploading images, so image field has to be required
+    image = RecipeImageField(required=True)
+    image_variants = ImageVariantSerializer(many=True, read_only=True)
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
-        # This serializer handles only uploading images, so image field has to be required
-        extra_kwargs = {'image': {'required': True}}
+
+    def update(self, instance, validated_data):
+        """Point the recipe to the image, storing it unless identical
+           bytes are already stored, and release the previous one.
+
+        Variants of an already stored image are reused; others are made
+        by a background job, see recipe.tasks."""
+        image = validated_data['image']
+        storage = instance.image.storage
+        old_name = instance.image.name
+        name = instance.image.field.generate_filename(instance, image.name)
+        if name == old_name:
+            return instance
+
+        stored_image = acquire_image(storage, name, image)
+        instance.image = name
+        instance.image_variants = stored_image.variants
+        instance.save(update_fields=['image', 'image_variants', 'updated_at'])
+        release_image(storage, old_name)
+        return instance
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background jobs."""
+
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'status', 'attempts', 'max_attempts',
+                  'result', 'error', 'created_at', 'updated_at')
+        read_only_fields = fields
@@ -0,0 +1,77 @@
+"""
+Signal handlers keeping recipe modification times, cached recipe API
+responses and image reference counts up to date.
+"""
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.images import release_image
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import invalidate_user_cache
+
+
+def touch_recipes(recipes):
+    """Bump updated_at of the given recipes queryset."""
+    recipes.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_on_change(sender, instance, **kwargs):
+    """Invalidate the owner's cache when an object changes."""
+    invalidate_user_cache(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image_on_delete(sender, instance, **kwargs):
+    """Drop the deleted recipe's reference to its stored image."""
+    if instance.image:
+        storage, name = instance.image.storage, instance.image.name
+        transaction.on_commit(lambda: release_image(storage, name))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_on_rename(sender, instance, created, **kwargs):
+    """Mark recipes using a changed tag or ingredient as modified."""
+    if not created:
+        touch_recipes(Recipe.objects.filter(
+            **{f'{sender._meta.model_name}s': instance}
+        ))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_on_delete(sender, instance, **kwargs):
+    """Mark recipes losing a deleted tag or ingredient as modified."""
+    touch_recipes(Recipe.objects.filter(
+        **{f'{sender._meta.model_name}s': instance}
+    ))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_on_m2m_change(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Mark recipes as modified and invalidate the owner's cache
+       when recipe associations change."""
+    if reverse and action == 'pre_clear':
+        # The cleared recipes are unknown after the fact.
+        touch_recipes(Recipe.objects.filter(
+            **{f'{instance._meta.model_name}s': instance}
+        ))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        touch_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif pk_set:
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+    invalidate_user_cache(instance.user_id)
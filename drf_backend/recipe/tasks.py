@@ -0,0 +1,65 @@
+"""
+Background tasks for recipes, run by `manage.py worker`.
+"""
+from django.db import transaction
+
+from core.images import create_image_variants, delete_image_variants
+from core.jobs import task
+from core.models import Recipe, StoredImage
+from recipe import serializers
+
+
+@task('recipe.create_image_variants')
+def create_recipe_image_variants(job):
+    """Create the resized variants of a recipe image.
+
+    No row is locked while resizing. Variants already made for the same
+    stored image are reused; ones made for an image released in the
+    meantime are thrown away."""
+    image_name = job.payload['image']
+    recipe = Recipe.objects.filter(
+        pk=job.payload['recipe_id'],
+        image=image_name
+    ).first()
+    if recipe is None:
+        return {'variants': 0}
+
+    storage = recipe.image.storage
+    stored_image = StoredImage.objects.filter(name=image_name).first()
+    variants = stored_image.variants if stored_image else []
+    if not variants:
+        variants = create_image_variants(recipe.image)
+
+    with transaction.atomic():
+        stored_image = StoredImage.objects.select_for_update().filter(
+            name=image_name
+        ).first()
+        if stored_image is None:
+            delete_image_variants(storage, variants)
+            return {'variants': 0}
+        stored_image.variants = variants
+        stored_image.save(update_fields=['variants'])
+
+        recipe = Recipe.objects.select_for_update().filter(
+            pk=recipe.pk,
+            image=image_name
+        ).first()
+        if recipe is not None:
+            recipe.image_variants = variants
+            recipe.save(update_fields=['image_variants', 'updated_at'])
+    return {'variants': len(variants)}
+
+
+@task('recipe.bulk_create')
+def bulk_create_recipes(job):
+    """Validate and create the recipes of a background bulk import."""
+    serializer = serializers.RecipeDetailSerializer(
+        data=job.payload['recipes'],
+        many=True,
+        context={'user': job.user}
+    )
+    if not serializer.is_valid():
+        return {'created': 0, 'errors': serializer.errors}
+    with transaction.atomic():
+        recipes = serializer.save(user=job.user)
+    return {'created': len(recipes), 'ids': [recipe.id for recipe in recipes]}
@@ -0,0 +1,179 @@
+"""
+Tests for the async read endpoints of the recipe API.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import get_cache
+from user.authentication import token_user_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ASYNC_RECIPES_URL = reverse('recipe:recipe-list-async')
+TAGS_URL = reverse('recipe:tag-list')
+ASYNC_TAGS_URL = reverse('recipe:tag-list-async')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+ASYNC_INGREDIENTS_URL = reverse('recipe:ingredient-list-async')
+
+
+def detail_url(recipe_id):
+    """Create and return recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def async_detail_url(recipe_id):
+    """Create and return async recipe detail URL."""
+    return reverse('recipe:recipe-detail-async', args=[recipe_id])
+
+
+def create_user(email='user@example.com', password='password123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe."""
+    default_params = {
+        'title': 'Test recipe title',
+        'time_minutes': 10,
+        'price': Decimal('10.00'),
+    }
+    default_params.update(params)
+    return Recipe.objects.create(user=user, **default_params)
+
+
+class PublicAsyncAPITests(TestCase):
+    """Test unauthenticated requests to the async endpoints."""
+
+    def test_auth_required(self):
+        """Test auth is required, as for the sync endpoints."""
+        res = APIClient().get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+
+class PrivateAsyncAPITests(TestCase):
+    """Test the async endpoints answer like the sync ones."""
+
+    def setUp(self):
+        get_cache().clear()
+        token_user_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipe = create_recipe(user=self.user)
+        self.recipe.tags.add(tag)
+        self.recipe.ingredients.add(ingredient)
+        create_recipe(user=self.user, title='Soup')
+        create_recipe(user=create_user('other@example.com'))
+
+    def assertSameResponse(self, sync_url, async_url, **extra):
+        """Assert both URLs answer with the same status and body."""
+        res_sync = self.client.get(sync_url, **extra)
+        res_async = self.client.get(async_url, **extra)
+
+        self.assertEqual(res_async.status_code, res_sync.status_code)
+        self.assertEqual(res_async.content, res_sync.content)
+        return res_sync, res_async
+
+    def test_list_recipes(self):
+        """Test the recipe list matches the sync endpoint."""
+        res_sync, res_async = self.assertSameResponse(
+            RECIPES_URL, ASYNC_RECIPES_URL
+        )
+
+        self.assertEqual(len(res_async.data), 2)
+        self.assertIn('ETag', res_async)
+
+    def test_list_recipes_filtered_and_paginated(self):
+        """Test filters and pagination apply to the async endpoint."""
+        tag = self.recipe.tags.get()
+        params = f'?tags={tag.id}&page_size=1'
+
+        res_sync = self.client.get(RECIPES_URL + params)
+        res_async = self.client.get(ASYNC_RECIPES_URL + params)
+
+        self.assertEqual(res_async.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            json.loads(res_async.content)['results'],
+            json.loads(res_sync.content)['results']
+        )
+
+    def test_list_recipes_invalid_filter(self):
+        """Test invalid filters are rejected like on the sync endpoint."""
+        res_sync, res_async = self.assertSameResponse(
+            RECIPES_URL + '?tags=abc', ASYNC_RECIPES_URL + '?tags=abc'
+        )
+
+        self.assertEqual(res_async.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_recipes_cached(self):
+        """Test repeated async list requests are cache hits."""
+        self.client.get(ASYNC_RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_list_recipes_not_modified(self):
+        """Test an unchanged list is answered with 304."""
+        etag = self.client.get(ASYNC_RECIPES_URL)['ETag']
+        get_cache().clear()
+
+        res = self.client.get(ASYNC_RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_recipe(self):
+        """Test the recipe detail matches the sync endpoint."""
+        res_sync, res_async = self.assertSameResponse(
+            detail_url(self.recipe.id), async_detail_url(self.recipe.id)
+        )
+
+        self.assertEqual(res_async.data['id'], self.recipe.id)
+        self.assertEqual(res_async['ETag'], res_sync['ETag'])
+
+    def test_retrieve_missing_recipe(self):
+        """Test other users' and unknown recipes are not found."""
+        other_recipe = Recipe.objects.exclude(user=self.user).get()
+        for recipe_id in (other_recipe.id, 0, 'abc'):
+            res = self.client.get(async_detail_url(recipe_id))
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_tags_and_ingredients(self):
+        """Test the tag and ingredient lists match the sync endpoints."""
+        self.assertSameResponse(TAGS_URL, ASYNC_TAGS_URL)
+        self.assertSameResponse(INGREDIENTS_URL, ASYNC_INGREDIENTS_URL)
+        self.assertSameResponse(
+            TAGS_URL, ASYNC_TAGS_URL, data={'assigned_only': 1}
+        )
+
+    def test_read_only(self):
+        """Test the async endpoints do not accept writes."""
+        res = self.client.post(ASYNC_RECIPES_URL, {'title': 'New'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_asgi_request(self):
+        """Test a request through the ASGI handler."""
+        res = await self.async_client.get(
+            ASYNC_RECIPES_URL,
+            AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(res.content)), 2)
@@ -0,0 +1,121 @@
+"""
+Tests for caching of the recipe API list responses.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+from recipe.cache import get_cache, get_stats
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_user(email='user@example.com', password='password123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe."""
+    default_params = {
+        'title': 'Test recipe title',
+        'time_minutes': 10,
+        'price': Decimal('10.00'),
+    }
+    default_params.update(params)
+    return Recipe.objects.create(user=user, **default_params)
+
+
+class ListCacheTests(TestCase):
+    """Test per-user caching of list responses."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Test a repeated list request is a cache hit without queries."""
+        create_recipe(user=self.user)
+        hits = get_stats()['hits']
+
+        res_1 = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(0):
+            res_2 = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res_1['X-Cache'], 'MISS')
+        self.assertEqual(res_2['X-Cache'], 'HIT')
+        self.assertEqual(res_1.content, res_2.content)
+        self.assertEqual(get_stats()['hits'], hits + 1)
+
+    def test_query_params_cached_separately(self):
+        """Test different query parameters are cached under different keys."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        create_recipe(user=self.user)
+
+        self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, {'tags': tag.id})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data), 1)
+
+    def test_recipe_change_invalidates_cache(self):
+        """Test saving a recipe invalidates the cached list."""
+        recipe = create_recipe(user=self.user, title='Old title')
+        self.client.get(RECIPES_URL)
+
+        recipe.title = 'New title'
+        recipe.save()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data[0]['title'], 'New title')
+
+    def test_tag_membership_change_invalidates_cache(self):
+        """Test changing recipe tags invalidates the cached lists."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='lunch')
+        self.client.get(RECIPES_URL)
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        recipe.tags.add(tag)
+        res_recipes = self.client.get(RECIPES_URL)
+        res_tags = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res_recipes.data[0]['tags'][0]['name'], 'lunch')
+        self.assertEqual(len(res_tags.data), 1)
+
+    def test_other_user_change_keeps_cache(self):
+        """Test changes of another user do not invalidate the cache."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        create_recipe(user=create_user(email='other@example.com'))
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_cache_limited_to_user(self):
+        """Test cached responses are never shared between users."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        other_client = APIClient()
+        other_client.force_authenticate(
+            create_user(email='other@example.com')
+        )
+        res = other_client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data, [])
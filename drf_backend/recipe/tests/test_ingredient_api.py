@@ -15,6 +15,7 @@ from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 
 def detail_url(ingredient_id):
@@ -136,3 +137,58 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_ingredients_with_recipe_count(self):
+        """Test listing ingredients with the number of recipes using them."""
+        ingredient_1 = Ingredient.objects.create(user=self.user, name='flour')
+        ingredient_2 = Ingredient.objects.create(user=self.user, name='egg')
+        Ingredient.objects.create(user=self.user, name='basil')
+        for title in ('bread', 'pasta'):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=40,
+                price=Decimal('3.00'),
+                user=self.user
+            )
+            recipe.ingredients.add(ingredient_1)
+        recipe.ingredients.add(ingredient_2)
+
+        res = self.client.get(
+            INGREDIENTS_URL, {'recipe_count': 1, 'assigned_only': 1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['name'], item['recipe_count']) for item in res.data],
+            [('flour', 2), ('egg', 1)]
+        )
+
+    def test_autocomplete_ingredients(self):
+        """Test suggesting ingredients, most used first."""
+        Ingredient.objects.create(user=self.user, name='Tomato')
+        ingredient = Ingredient.objects.create(
+            user=self.user, name='tomatillo'
+        )
+        Ingredient.objects.create(user=self.user, name='cherry tomato')
+        recipe = Recipe.objects.create(
+            title='salsa verde',
+            time_minutes=15,
+            price=Decimal('7.00'),
+            user=self.user
+        )
+        recipe.ingredients.add(ingredient)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'tom'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['tomatillo', 'Tomato', 'cherry tomato']
+        )
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'to'})
+
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['tomatillo', 'Tomato']
+        )
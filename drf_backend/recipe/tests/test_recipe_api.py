@@ -3,22 +3,40 @@ Test for the recipe API.
 """
 from decimal import Decimal
 import tempfile
+import json
+import csv
+import io
 import os
+import struct
+import zlib
+from unittest.mock import patch
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Recipe, Tag, Ingredient
+from core.jobs import run_pending_jobs
+from core.models import Job, Recipe, StoredImage, Tag, Ingredient
 
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_CREATE_URL = reverse('recipe:recipe-bulk-create')
+EXPORT_URL = reverse('recipe:recipe-export')
+JOBS_URL = reverse('recipe:job-list')
+
+
+def job_url(job_id):
+    """Create and return a background job detail URL."""
+    return reverse('recipe:job-detail', args=[job_id])
 
 
 def detail_url(recipe_id):
@@ -104,6 +122,54 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_recipes_query_count_constant(self):
+        """Test listing recipes does not run a query per recipe."""
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'tag {i}')
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'ing {i}')
+            )
+
+        # validators + recipes + prefetched tags + prefetched ingredients
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+        self.assertEqual(len(res.data[0]['tags']), 1)
+        self.assertEqual(len(res.data[0]['ingredients']), 1)
+
+    def test_list_recipes_paginated_with_cursor(self):
+        """Test recipes can be paged through with a cursor."""
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+        expected_ids = [recipe.id for recipe in reversed(recipes)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        received_ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertIsNone(res.data['previous'])
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            received_ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(received_ids, expected_ids)
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_list_recipes_unpaginated_by_default(self):
+        """Test recipes are not paginated without a page size or cursor."""
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
         recipe = create_recipe(user=self.user)
@@ -264,6 +330,64 @@ class PrivateRecipeAPITests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_reuses_tag_ignoring_case(self):
+        """Test tag names are matched case-insensitively."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = {
+            'title': 'Tofu',
+            'time_minutes': 15,
+            'price': Decimal('6.00'),
+            'tags': [{'name': 'vegan'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+
+    def test_create_recipe_reuses_non_ascii_tag(self):
+        """Test tags are matched as the database lowercases names."""
+        tag = Tag.objects.create(user=self.user, name='İstanbul')
+        payload = {
+            'title': 'Simit',
+            'time_minutes': 40,
+            'price': Decimal('2.00'),
+            'tags': [{'name': 'İstanbul'}, {'name': 'Bakery'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertIn(tag, recipe.tags.all())
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_create_recipe_query_count_independent_of_ingredients(self):
+        """Test saving many ingredients does not run a query per item."""
+        Ingredient.objects.create(user=self.user, name='salt')
+
+        def create_with_ingredients(count):
+            payload = {
+                'title': f'Recipe with {count} ingredients',
+                'time_minutes': 10,
+                'price': Decimal('5.00'),
+                'ingredients': [{'name': 'salt'}] + [
+                    {'name': f'ingredient {count}-{i}'}
+                    for i in range(count)
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(res.data['ingredients']), count + 1)
+            return len(queries)
+
+        self.assertEqual(create_with_ingredients(2),
+                         create_with_ingredients(40))
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 43
+        )
+
     def test_tag_on_update(self):
         """Test creating a tag when updating a recipe."""
         recipe = create_recipe(user=self.user)
@@ -394,6 +518,26 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(ingredient_2, recipe.ingredients.all())
         self.assertNotIn(ingredient_1, recipe.ingredients.all())
 
+    def test_update_ingredients_keeps_unchanged_rows(self):
+        """Test updating ingredients only touches changed associations."""
+        flour = Ingredient.objects.create(user=self.user, name='flour')
+        sugar = Ingredient.objects.create(user=self.user, name='sugar')
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(flour, sugar)
+        through = Recipe.ingredients.through
+        flour_row = through.objects.get(recipe=recipe, ingredient=flour)
+
+        payload = {'ingredients': [{'name': 'flour'}, {'name': 'butter'}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(recipe.ingredients.values_list('name', flat=True)),
+            {'flour', 'butter'}
+        )
+        self.assertTrue(through.objects.filter(id=flour_row.id).exists())
+
     def test_clear_ingredients(self):
         """Test clearing a recipes ingredients."""
         ingredient = Ingredient.objects.create(
@@ -450,6 +594,282 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(serializer_2.data, res.data)
         self.assertNotIn(serializer_3.data, res.data)
 
+    def test_filter_by_tags_match_all(self):
+        """Test filtering recipes having all of the given tags."""
+        tag_1 = Tag.objects.create(user=self.user, name='vegan')
+        tag_2 = Tag.objects.create(user=self.user, name='quick')
+        recipe_1 = create_recipe(user=self.user, title='salad')
+        recipe_2 = create_recipe(user=self.user, title='stew')
+        recipe_1.tags.add(tag_1, tag_2)
+        recipe_2.tags.add(tag_1)
+
+        params = {'tags': f'{tag_1.id},{tag_2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [recipe_1.id])
+
+    def test_filter_by_tags_and_ingredients_unique(self):
+        """Test combined filters return each matching recipe once."""
+        tag_1 = Tag.objects.create(user=self.user, name='dinner')
+        tag_2 = Tag.objects.create(user=self.user, name='spicy')
+        ingredient_1 = Ingredient.objects.create(user=self.user, name='rice')
+        ingredient_2 = Ingredient.objects.create(user=self.user, name='chili')
+        recipe_1 = create_recipe(user=self.user, title='curry')
+        recipe_1.tags.add(tag_1, tag_2)
+        recipe_1.ingredients.add(ingredient_1, ingredient_2)
+        recipe_2 = create_recipe(user=self.user, title='risotto')
+        recipe_2.tags.add(tag_1)
+
+        params = {
+            'tags': f'{tag_1.id},{tag_2.id}',
+            'ingredients': f'{ingredient_1.id},{ingredient_2.id}',
+        }
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [recipe_1.id])
+
+    def test_filter_invalid_match_returns_error(self):
+        """Test an unknown match mode is rejected."""
+        res = self.client.get(RECIPES_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_invalid_ids_returns_error(self):
+        """Test tag and ingredient IDs that are not integers are rejected."""
+        for params in ({'tags': 'abc'}, {'ingredients': '1,x'}):
+            for url in (RECIPES_URL, EXPORT_URL):
+                res = self.client.get(url, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(list(res.data), list(params))
+
+    def test_search_recipes(self):
+        """Test full-text search over titles and descriptions."""
+        recipe_1 = create_recipe(
+            user=self.user,
+            title='Tomato soup',
+            description='A warm bowl'
+        )
+        recipe_2 = create_recipe(
+            user=self.user,
+            title='Pasta',
+            description='Served with roasted tomatoes'
+        )
+        create_recipe(user=self.user, title='Pancakes', description='Sweet')
+
+        res = self.client.get(RECIPES_URL, {'search': 'tomato'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Title matches rank above description matches.
+        self.assertEqual(
+            [r['id'] for r in res.data],
+            [recipe_1.id, recipe_2.id]
+        )
+
+    def test_search_combined_with_tags(self):
+        """Test search can be combined with tag filtering."""
+        tag = Tag.objects.create(user=self.user, name='lunch')
+        recipe_1 = create_recipe(user=self.user, title='Chicken salad')
+        recipe_1.tags.add(tag)
+        create_recipe(user=self.user, title='Chicken curry')
+
+        params = {'search': 'chicken', 'tags': f'{tag.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [recipe_1.id])
+
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes from a JSON array."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10 + i,
+                'price': '5.00',
+                'tags': [{'name': 'dinner'}, {'name': f'tag {i}'}],
+                'ingredients': [{'name': 'salt'}],
+            }
+            for i in range(3)
+        ]
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [r['title'] for r in res.data],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2']
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        for item in res.data:
+            recipe = Recipe.objects.get(id=item['id'])
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+            self.assertEqual(len(item['tags']), 2)
+
+    def test_bulk_create_recipes_ndjson(self):
+        """Test creating many recipes from an NDJSON body."""
+        body = (
+            '{"title": "Soup", "timeMinutes": 30, "price": "4.00"}\n'
+            '\n'
+            '{"title": "Bread", "timeMinutes": 60, "price": "2.00"}\n'
+        )
+        res = self.client.post(
+            BULK_CREATE_URL,
+            body,
+            content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Recipe.objects.values_list('title', flat=True)),
+            {'Soup', 'Bread'}
+        )
+
+    def test_bulk_create_ndjson_invalid_encoding(self):
+        """Test an NDJSON body that is not UTF-8 is rejected."""
+        body = b'{"title": "Soup"}\n{"title": "Cr\xe8me"}\n'
+        res = self.client.post(
+            BULK_CREATE_URL,
+            body,
+            content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', res.data['detail'])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_invalid_item_creates_nothing(self):
+        """Test one invalid recipe rejects the whole batch."""
+        payload = [
+            {'title': 'Valid', 'time_minutes': 5, 'price': '1.00'},
+            {'title': 'Invalid', 'price': '1.00'},
+        ]
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('time_minutes', res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_in_background(self):
+        """Test a background bulk import is queued and run as a job."""
+        payload = [
+            {'title': 'Soup', 'time_minutes': 30, 'price': '4.00',
+             'tags': [{'name': 'Dinner'}]},
+            {'title': 'Bread', 'time_minutes': 60, 'price': '2.00'},
+        ]
+        res = self.client.post(
+            BULK_CREATE_URL + '?background=1', payload, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], Job.QUEUED)
+        self.assertFalse(Recipe.objects.exists())
+
+        run_pending_jobs()
+        res = self.client.get(job_url(res.data['id']))
+
+        self.assertEqual(res.data['status'], Job.SUCCEEDED)
+        self.assertEqual(res.data['result']['created'], 2)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(
+            sorted(res.data['result']['ids']),
+            sorted(recipes.values_list('id', flat=True))
+        )
+        soup = recipes.get(title='Soup')
+        self.assertEqual(
+            list(soup.tags.values_list('name', flat=True)), ['Dinner']
+        )
+
+    def test_bulk_create_in_background_invalid(self):
+        """Test validation errors of a background import are reported."""
+        payload = [{'title': 'Invalid', 'price': '1.00'}]
+        res = self.client.post(
+            BULK_CREATE_URL + '?background=1', payload, format='json'
+        )
+        run_pending_jobs()
+        res = self.client.get(job_url(res.data['id']))
+
+        self.assertEqual(res.data['status'], Job.SUCCEEDED)
+        self.assertEqual(res.data['result']['created'], 0)
+        self.assertIn('time_minutes', res.data['result']['errors'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_invalid_background(self):
+        """Test a background flag other than 0 or 1 is rejected."""
+        payload = [{'title': 'Soup', 'time_minutes': 10, 'price': '1.00'}]
+        res = self.client.post(
+            BULK_CREATE_URL + '?background=yes', payload, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('background', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_list_jobs_limited_to_user(self):
+        """Test users only see their own background jobs."""
+        other_user = create_user(email='other@example.com', password='pass123')
+        Job.objects.create(name='recipe.bulk_create', user=other_user)
+        job = Job.objects.create(name='recipe.bulk_create', user=self.user)
+
+        res = self.client.get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([j['id'] for j in res.data], [job.id])
+        res = self.client.get(job_url(job.id - 1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_recipes_ndjson(self):
+        """Test streaming the user's recipes as NDJSON."""
+        recipe = create_recipe(user=self.user, title='Pie')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='dessert'))
+        create_recipe(user=self.user, title='Stew')
+        create_recipe(
+            user=create_user(email='other@example.com', password='pass123'),
+            title='Other'
+        )
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['title'] for row in rows], ['Stew', 'Pie'])
+        self.assertEqual(rows[1]['tags'][0]['name'], 'dessert')
+        self.assertIn('timeMinutes', rows[0])
+
+    def test_export_recipes_csv(self):
+        """Test streaming the user's recipes as CSV."""
+        recipe = create_recipe(user=self.user, title='Curry')
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='rice'),
+            Ingredient.objects.create(user=self.user, name='chili'),
+        )
+
+        res = self.client.get(EXPORT_URL, {'file_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Curry')
+        self.assertEqual(
+            set(rows[0]['ingredients'].split(';')),
+            {'rice', 'chili'}
+        )
+
+    def test_export_invalid_format_error(self):
+        """Test exporting in an unknown format fails."""
+        res = self.client.get(EXPORT_URL, {'file_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ImageUploadTests(TestCase):
     """Test for the image upload API."""
@@ -464,7 +884,24 @@ class ImageUploadTests(TestCase):
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
-        self.recipe.image.delete()
+        recipe = Recipe.objects.filter(id=self.recipe.id).first()
+        if recipe is not None:
+            for variant in recipe.image_variants:
+                recipe.image.storage.delete(variant['name'])
+            recipe.image.delete()
+
+    def upload_image(self, size, color='black'):
+        """Upload a JPEG of the given size to the recipe."""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', size, color)
+            img.save(image_file, format='JPEG')
+            image_file.seek(0)
+            res = self.client.post(url, {'image': image_file},
+                                   format='multipart')
+        run_pending_jobs()
+        self.recipe.refresh_from_db()
+        return res
 
     def test_upload_image_to_recipe(self):
         """Test uploading an image to recipe."""
@@ -481,6 +918,119 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_creates_variants(self):
+        """Test resized WebP and JPEG variants are made of an upload."""
+        res = self.upload_image((1500, 1000))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        variants = self.recipe.image_variants
+        self.assertEqual(
+            [(v['width'], v['format']) for v in variants],
+            [(320, 'webp'), (320, 'jpeg'), (640, 'webp'), (640, 'jpeg'),
+             (1280, 'webp'), (1280, 'jpeg')]
+        )
+        storage = self.recipe.image.storage
+        for variant in variants:
+            with Image.open(storage.path(variant['name'])) as img:
+                self.assertEqual(img.width, variant['width'])
+                self.assertEqual(img.format, variant['format'].upper())
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(len(res.data['image_variants']), 6)
+        self.assertTrue(
+            res.data['image_variants'][0]['url'].startswith('http')
+        )
+
+    def test_upload_image_queues_variants_job(self):
+        """Test variants are made by a background job, not the request."""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (800, 600)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            res = self.client.post(url, {'image': image_file},
+                                   format='multipart')
+        self.recipe.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_variants'], [])
+        self.assertEqual(res.data['job']['status'], Job.QUEUED)
+        self.assertEqual(self.recipe.image_variants, [])
+
+        run_pending_jobs()
+        job = Job.objects.get(id=res.data['job']['id'])
+        self.recipe.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'variants': 4})
+        self.assertEqual(len(self.recipe.image_variants), 4)
+
+    def test_upload_small_image_not_upscaled(self):
+        """Test an image smaller than every variant width keeps its size."""
+        self.upload_image((100, 50))
+
+        self.assertEqual(
+            [(v['width'], v['format']) for v in self.recipe.image_variants],
+            [(100, 'webp'), (100, 'jpeg')]
+        )
+
+    def test_upload_image_replaces_variants(self):
+        """Test uploading a new image deletes the old variants."""
+        self.upload_image((400, 400))
+        old_names = [v['name'] for v in self.recipe.image_variants]
+        old_names.append(self.recipe.image.name)
+
+        self.upload_image((400, 400), color='white')
+
+        storage = self.recipe.image.storage
+        for name in old_names:
+            self.assertFalse(storage.exists(name))
+        self.assertFalse(StoredImage.objects.filter(name=old_names[-1]))
+
+    def test_identical_images_stored_once(self):
+        """Test recipes with identical images share one stored file."""
+        self.upload_image((700, 500), color='red')
+        other = create_recipe(user=self.user)
+        url = image_upload_url(other.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (700, 500), 'red').save(image_file, format='JPEG')
+            image_file.seek(0)
+            res = self.client.post(url, {'image': image_file},
+                                   format='multipart')
+        other.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(other.image.name, self.recipe.image.name)
+        self.assertEqual(other.image_variants, self.recipe.image_variants)
+        self.assertIsNone(res.data['job'])
+        stored_image = StoredImage.objects.get(name=other.image.name)
+        self.assertEqual(stored_image.ref_count, 2)
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.recipe.image.path)),
+            [os.path.basename(self.recipe.image.name)]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        stored_image.refresh_from_db()
+        self.assertEqual(stored_image.ref_count, 1)
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        self.assertFalse(StoredImage.objects.exists())
+        self.assertFalse(os.path.exists(self.recipe.image.path))
+        for variant in stored_image.variants:
+            self.assertFalse(self.recipe.image.storage.exists(variant['name']))
+
+    def test_reupload_same_image_is_noop(self):
+        """Test uploading the current image again changes nothing."""
+        self.upload_image((50, 50), color='blue')
+        name = self.recipe.image.name
+
+        res = self.upload_image((50, 50), color='blue')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.recipe.image.name, name)
+        self.assertEqual(StoredImage.objects.get(name=name).ref_count, 1)
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image."""
         url = image_upload_url(self.recipe.id)
@@ -488,3 +1038,104 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def post_file(self, content, name='image.png'):
+        """Upload raw file content as the recipe image."""
+        return self.client.post(
+            image_upload_url(self.recipe.id),
+            {'image': SimpleUploadedFile(name, content)},
+            format='multipart'
+        )
+
+    def test_upload_decompression_bomb_rejected(self):
+        """Test a huge image is rejected from its header alone."""
+        def chunk(chunk_type, data):
+            return (struct.pack('>I', len(data)) + chunk_type + data
+                    + struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+        ihdr = struct.pack('>IIBBBBB', 100000, 100000, 8, 2, 0, 0, 0)
+        header = (b'\x89PNG\r\n\x1a\n'
+                  + chunk(b'IHDR', ihdr) + chunk(b'IDAT', b''))
+
+        with patch('PIL.ImageFile.ImageFile.load') as load:
+            res = self.post_file(header)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', str(res.data['image']))
+        load.assert_not_called()
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=10000)
+    def test_upload_too_many_pixels(self):
+        """Test images over the pixel limit are rejected."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (101, 100)).save(buffer, format='PNG')
+
+        res = self.post_file(buffer.getvalue())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('10000 pixels', str(res.data['image']))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1000)
+    def test_upload_too_many_bytes(self):
+        """Test images over the byte limit are rejected."""
+        buffer = io.BytesIO()
+        Image.effect_noise((100, 100), 64).save(buffer, format='PNG')
+
+        res = self.post_file(buffer.getvalue())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('1000 bytes', str(res.data['image']))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1000)
+    def test_upload_oversized_body_refused(self):
+        """Test requests far over the byte limit are refused unread."""
+        res = self.post_file(os.urandom(200 * 1024))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    def test_upload_unsupported_format(self):
+        """Test image formats other than the accepted ones are rejected."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='GIF')
+
+        res = self.post_file(buffer.getvalue(), name='image.gif')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_metadata_stripped(self):
+        """Test EXIF data is removed and its orientation applied."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise.
+        exif[0x010F] = 'Camera maker'
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20)).save(buffer, format='JPEG', exif=exif)
+
+        res = self.post_file(buffer.getvalue(), name='photo.jpg')
+        run_pending_jobs()
+        self.recipe.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with Image.open(self.recipe.image.path) as img:
+            self.assertEqual(img.size, (20, 40))
+            self.assertEqual(dict(img.getexif()), {})
+        self.assertEqual(self.recipe.image_variants[0]['width'], 20)
+
+    def test_image_not_writable_through_recipe(self):
+        """Test images can only be changed through the upload endpoint."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='PNG')
+
+        res = self.client.patch(
+            detail_url(self.recipe.id),
+            {'image': SimpleUploadedFile('image.png', buffer.getvalue())},
+            format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
@@ -16,6 +16,7 @@ from recipe.serializers import TagSerializer
 
 
 TAGS_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 def create_user(email='user@example.com', password='password123'):
@@ -73,6 +74,20 @@ class PrivateTagsAPITests(TestCase):
         self.assertEqual(res.data[0]['name'], tag.name)
         self.assertEqual(res.data[0]['id'], tag.id)
 
+    def test_retrieve_tags_paginated_with_cursor(self):
+        """Test tags can be paged through with a cursor."""
+        for name in ('Breakfast', 'Dinner', 'Lunch'):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag['name'] for tag in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names += [tag['name'] for tag in res.data['results']]
+
+        self.assertEqual(names, ['Lunch', 'Dinner', 'Breakfast'])
+        self.assertIsNone(res.data['next'])
+
     def test_update_tag(self):
         """Test updating a tag."""
         tag = Tag.objects.create(user=self.user, name='Old Tag')
@@ -85,6 +100,18 @@ class PrivateTagsAPITests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(res.data['name'], payload['name'])
 
+    def test_update_tag_duplicate_name_error(self):
+        """Test renaming a tag to an existing name, ignoring case, fails."""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='Sweets')
+
+        url = detail_url(tag.id)
+        res = self.client.patch(url, {'name': 'dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Sweets')
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='Tag')
@@ -135,4 +162,117 @@ class PrivateTagsAPITests(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data), 1)
+
+    def test_tags_with_recipe_count(self):
+        """Test listing tags with the number of recipes using them."""
+        tag_1 = Tag.objects.create(user=self.user, name='vegan')
+        tag_2 = Tag.objects.create(user=self.user, name='quick')
+        Tag.objects.create(user=self.user, name='dessert')
+        for title in ('salad', 'curry'):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=20,
+                price=Decimal('5.00'),
+                user=self.user
+            )
+            recipe.tags.add(tag_1)
+        recipe.tags.add(tag_2)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'recipe_count': 1})
+
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data],
+            [('vegan', 2), ('quick', 1), ('dessert', 0)]
+        )
+
+        res = self.client.get(
+            TAGS_URL, {'recipe_count': 1, 'assigned_only': 1}
+        )
+
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data],
+            [('vegan', 2), ('quick', 1)]
+        )
+
+    def test_invalid_flags_rejected(self):
+        """Test flags other than 0 or 1 are rejected."""
+        for param in ('assigned_only', 'recipe_count'):
+            res = self.client.get(TAGS_URL, {param: 'yes'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    def test_recipe_count_not_included_by_default(self):
+        """Test recipe counts are only included when asked for."""
+        Tag.objects.create(user=self.user, name='vegan')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertNotIn('recipe_count', res.data[0])
+
+    def test_autocomplete_ranked_by_usage(self):
+        """Test prefix matches come first, most used first."""
+        names = ('Pasta', 'pastry', 'Tapas', 'Soup', 'antipasto')
+        tags = {name: Tag.objects.create(user=self.user, name=name)
+                for name in names}
+        Tag.objects.create(user=create_user('other@example.com'),
+                           name='Pasta bake')
+        recipe = Recipe.objects.create(
+            title='Tarte',
+            time_minutes=50,
+            price=Decimal('8.00'),
+            user=self.user
+        )
+        recipe.tags.add(tags['pastry'], tags['antipasto'])
+
+        with self.assertNumQueries(2):
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 'PAS'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data],
+            [('pastry', 1), ('Pasta', 0), ('antipasto', 1), ('Tapas', 0)]
+        )
+
+    def test_autocomplete_limit(self):
+        """Test only the requested number of suggestions is returned."""
+        for name in ('Pasta', 'Pastry', 'Antipasto'):
+            Tag.objects.create(user=self.user, name=name)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pa', 'limit': 2})
+
+        self.assertEqual([tag['name'] for tag in res.data],
+                         ['Pasta', 'Pastry'])
+
+    def test_autocomplete_invalid_params(self):
+        """Test bad limits are rejected and empty terms match nothing."""
+        Tag.objects.create(user=self.user, name='Pasta')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pa', 'limit': 100})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pa', 'limit': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': ' '})
+        self.assertEqual(res.data, [])
+
+    def test_autocomplete_escapes_wildcards(self):
+        """Test LIKE wildcards in the term are matched literally."""
+        Tag.objects.create(user=self.user, name='100% rye')
+        Tag.objects.create(user=self.user, name='1000 calories')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': '100%'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['100% rye'])
+
+    def test_autocomplete_non_ascii(self):
+        """Test terms are lowercased as the database lowercases names."""
+        Tag.objects.create(user=self.user, name='İstanbul')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'İst'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['İstanbul'])
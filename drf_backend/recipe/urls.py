@@ -5,14 +5,48 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from recipe import views
+from recipe.async_views import AsyncViewSetView
 
 router = DefaultRouter()
 router.register('recipes', views.RecipeViewSet)
 router.register('tags', views.TagViewSet)
 router.register('ingredients', views.IngredientViewSet)
+router.register('jobs', views.JobViewSet)
 
 app_name = 'recipe'
 
-urlpatterns = [
+# Async variants of the read endpoints, for serving under ASGI.
+async_urlpatterns = [
+    path(
+        'async/recipes/',
+        AsyncViewSetView.as_view(
+            viewset_class=views.RecipeViewSet, action='list'
+        ),
+        name='recipe-list-async'
+    ),
+    path(
+        'async/recipes/<pk>/',
+        AsyncViewSetView.as_view(
+            viewset_class=views.RecipeViewSet, action='retrieve'
+        ),
+        name='recipe-detail-async'
+    ),
+    path(
+        'async/tags/',
+        AsyncViewSetView.as_view(
+            viewset_class=views.TagViewSet, action='list'
+        ),
+        name='tag-list-async'
+    ),
+    path(
+        'async/ingredients/',
+        AsyncViewSetView.as_view(
+            viewset_class=views.IngredientViewSet, action='list'
+        ),
+        name='ingredient-list-async'
+    ),
+]
+
+urlpatterns = async_urlpatterns + [
     path('', include(router.urls)),
 ]
@@ -1,18 +1,44 @@
 """
 Views for the recipe APIs.
 """
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import (Count, Exists, F, OuterRef, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce, Collate, Lower
 from drf_spectacular.utils import (extend_schema_view,
                                    extend_schema,
                                    OpenApiParameter,
                                    OpenApiTypes)
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Recipe, Tag, Ingredient
+from core.jobs import enqueue
+from core.models import Job, Recipe, Tag, Ingredient
+from core.parsers import CamelCaseJSONParser
+from user.authentication import (CachedTokenAuthentication,
+                                 SignedTokenAuthentication)
 from recipe import serializers
+from recipe.async_views import AsyncListModelMixin, AsyncRetrieveModelMixin
+from recipe.cache import CachedListMixin
+from recipe.conditional import ConditionalGetMixin
+from recipe.exports import recipes_to_csv, recipes_to_ndjson
+from recipe.parsers import CamelCaseNDJSONParser
+from recipe.pagination import (RecipeCursorPagination,
+                               RecipeAttributeCursorPagination)
+
+
+def _flag_param(request, name):
+    """Return a 0 or 1 query param as a boolean."""
+    value = request.query_params.get(name, '0')
+    if value not in ('0', '1'):
+        raise ValidationError({name: 'Must be 0 or 1.'})
+    return value == '1'
 
 
 @extend_schema_view(
@@ -27,38 +53,111 @@ from recipe import serializers
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma-separated list of ingredient IDs to filter.'
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full-text search over recipe titles and '
+                            'descriptions. Unpaginated results are '
+                            'ordered by relevance.'
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Return recipes with any (default) or all '
+                            'of the given tags and ingredients.'
             )
         ]
     )
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListMixin,
+                    ConditionalGetMixin,
+                    AsyncListModelMixin,
+                    AsyncRetrieveModelMixin,
+                    viewsets.ModelViewSet):
     """Manage recipe APIs"""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,
+                              SignedTokenAuthentication)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    bulk_create_limit = 10000
+    export_chunk_size = 500
+    export_formats = {
+        'ndjson': ('application/x-ndjson', recipes_to_ndjson),
+        'csv': ('text/csv', recipes_to_csv),
+    }
 
     @staticmethod
-    def _params_to_ints(qs):
+    def _params_to_ints(name, qs):
         """Convert a list of string IDs to a list of integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {name: 'Must be a comma-separated list of IDs.'}
+            )
+
+    @staticmethod
+    def _filter_by_related(queryset, through, field, ids, match_all):
+        """Filter recipes by related IDs using the M2M through table.
+
+        Both modes are semi-joins, so recipes are never duplicated
+        and no DISTINCT is needed.
+        """
+        ids = set(ids)
+        if match_all:
+            recipe_ids = through.objects.filter(
+                **{f'{field}__in': ids}
+            ).values('recipe_id').annotate(
+                matched=Count(field)
+            ).filter(matched=len(ids)).values('recipe_id')
+            return queryset.filter(id__in=recipe_ids)
+
+        return queryset.filter(Exists(through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            **{f'{field}__in': ids}
+        )))
 
     def get_queryset(self):
         """Return objects for the authenticated user only
-           with optional filtering by tags and/or ingredients."""
+           with optional filtering by tags and/or ingredients
+           and full-text search."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': 'Must be "any" or "all".'})
+        match_all = match == 'all'
+
+        queryset = self.queryset.prefetch_related('tags', 'ingredients')
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_by_related(
+                queryset, Recipe.tags.through, 'tag_id',
+                self._params_to_ints('tags', tags), match_all
+            )
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = self._filter_by_related(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                self._params_to_ints('ingredients', ingredients), match_all
+            )
+
+        search = self.request.query_params.get('search')
+        if search:
+            query = SearchQuery(
+                search, config='english', search_type='websearch'
+            )
+            return queryset.filter(
+                user=self.request.user,
+                search_vector=query
+            ).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', '-id')
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).order_by('-id')
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -76,16 +175,127 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe."""
         recipe = self.get_object()
+        # Refuse oversized uploads before their body is read, allowing
+        # for the multipart headers around the file.
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if content_length > settings.RECIPE_IMAGE_MAX_BYTES + 64 * 1024:
+            return Response(
+                {'image': [
+                    f'Images must be at most '
+                    f'{settings.RECIPE_IMAGE_MAX_BYTES} bytes.'
+                ]},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            recipe = serializer.save()
+            job = None
+            if not recipe.image_variants:
+                job = enqueue(
+                    'recipe.create_image_variants',
+                    {'recipe_id': recipe.id, 'image': recipe.image.name},
+                    user=request.user
+                )
+            data = dict(
+                serializer.data,
+                job=job and serializers.JobSerializer(job).data
+            )
+            return Response(data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'background',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Import in a background job and return it '
+                            'instead of the created recipes.'
+            )
+        ],
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses={201: serializers.RecipeDetailSerializer(many=True),
+                   202: serializers.JobSerializer}
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk',
+            parser_classes=(CamelCaseJSONParser, CamelCaseNDJSONParser))
+    def bulk_create(self, request):
+        """Create many recipes from a JSON array or NDJSON body.
+
+        All recipes are validated first and saved in one transaction;
+        on failure the response lists the errors of each item. With
+        `background=1` this happens in a job whose result has them."""
+        if (isinstance(request.data, list)
+                and len(request.data) > self.bulk_create_limit):
+            return Response(
+                {'non_field_errors': [
+                    f'Cannot create more than {self.bulk_create_limit} '
+                    f'recipes at once.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if _flag_param(request, 'background'):
+            job = enqueue(
+                'recipe.bulk_create',
+                {'recipes': request.data},
+                user=request.user
+            )
+            return Response(
+                serializers.JobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if serializer.is_valid():
+            with transaction.atomic():
+                serializer.save(user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'file_format',
+                OpenApiTypes.STR, enum=['ndjson', 'csv'],
+                description='Export format, NDJSON by default.'
+            )
+        ],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR,
+                   (200, 'text/csv'): OpenApiTypes.STR}
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream all of the user's recipes, honouring list filters.
+
+        Rows are read through a server-side cursor in chunks,
+        so memory use does not grow with the number of recipes."""
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in self.export_formats:
+            return Response(
+                {'file_format': [
+                    f'Must be one of: {", ".join(self.export_formats)}.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content_type, to_rows = self.export_formats[file_format]
+        recipes = self.get_queryset().iterator(
+            chunk_size=self.export_chunk_size
+        )
+        response = StreamingHttpResponse(
+            to_rows(recipes, context=self.get_serializer_context()),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{file_format}"'
+        )
+        return response
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -94,38 +304,171 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes.'
+            ),
+            OpenApiParameter(
+                'recipe_count',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Include the number of recipes using '
+                            'each item.'
             )
         ]
     )
 )
-class BaseRecipeAttributeViewSet(mixins.UpdateModelMixin,
+class BaseRecipeAttributeViewSet(CachedListMixin,
+                                 AsyncListModelMixin,
+                                 mixins.UpdateModelMixin,
                                  mixins.DestroyModelMixin,
                                  mixins.ListModelMixin,
                                  viewsets.GenericViewSet):
     """Base ViewSet for recipe attributes."""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,
+                              SignedTokenAuthentication)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttributeCursorPagination
+    # M2M through model and its column referencing the attribute.
+    recipe_through = None
+    through_field = None
+    max_autocomplete_limit = 50
+    autocomplete_candidates = 500
+    # Names containing the term cannot use the index, so the user's
+    # names are scanned for it; shorter fragments would match most.
+    autocomplete_min_fragment = 3
 
     def get_queryset(self):
-        """Filter queryset to authenticated user and, if given, attributes."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
+        """Filter queryset to authenticated user and, if given, attributes.
+
+        Assigned items are found with a semi-join on the through table,
+        so no DISTINCT is needed, and recipe counts are aggregated in
+        the same query."""
+        assigned_only = _flag_param(self.request, 'assigned_only')
+        recipe_count = _flag_param(self.request, 'recipe_count')
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(Exists(
+                self.recipe_through.objects.filter(
+                    **{self.through_field: OuterRef('pk')}
+                )
+            ))
+        if recipe_count:
+            queryset = queryset.annotate(recipe_count=Count('recipe'))
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', 'id')
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR, required=True,
+                description='Start or part of the names to suggest.'
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Number of suggestions, 10 by default.'
+            )
+        ]
+    )
+    @action(methods=['GET'], detail=False, url_path='autocomplete',
+            pagination_class=None)
+    def autocomplete(self, request):
+        """Suggest the user's items for a name being typed.
+
+        Names starting with `q` come first, then names containing it if
+        it is long enough, each ranked by the number of recipes using
+        them. Only the first candidates in name order are ranked, so the
+        lower(name) index range scan stops early and results sharpen as
+        the user types."""
+        term = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        if not 0 < limit <= self.max_autocomplete_limit:
+            raise ValidationError({'limit': (
+                f'Must be between 1 and {self.max_autocomplete_limit}.'
+            )})
+        if not term:
+            return Response([])
+
+        names = self.queryset.filter(
+            user=request.user
+        ).alias(
+            lower_name=Collate(Lower('name'), 'C')
+        ).order_by('lower_name')
+        # Lowercased by the database like the names, as Python lowercases
+        # some letters differently, e.g. 'İ'.
+        lower_term = Lower(Value(term))
+        matches = self._most_used(
+            names.filter(lower_name__startswith=lower_term), limit
+        )
+        if (len(matches) < limit
+                and len(term) >= self.autocomplete_min_fragment):
+            matches += self._most_used(
+                names.filter(
+                    lower_name__contains=lower_term
+                ).exclude(
+                    lower_name__startswith=lower_term
+                ),
+                limit - len(matches)
+            )
+
+        serializer = self.get_serializer(matches, many=True)
+        return Response(serializer.data)
+
+    def _most_used(self, queryset, limit):
+        """Return the `limit` most used of the first candidates."""
+        usage = self.recipe_through.objects.filter(
+            **{self.through_field: OuterRef('pk')}
+        ).order_by().values(self.through_field).annotate(
+            count=Count('*')
+        ).values('count')
+        candidates = queryset.annotate(
+            recipe_count=Coalesce(Subquery(usage), 0)
+        )[:self.autocomplete_candidates]
+        return sorted(
+            candidates,
+            key=lambda item: (-item.recipe_count, item.name.lower())
+        )[:limit]
 
 
+@extend_schema_view(
+    autocomplete=extend_schema(
+        responses=serializers.TagSerializer(many=True)
+    )
+)
 class TagViewSet(BaseRecipeAttributeViewSet):
     """Manage tags in the database"""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    recipe_through = Recipe.tags.through
+    through_field = 'tag_id'
 
 
+@extend_schema_view(
+    autocomplete=extend_schema(
+        responses=serializers.IngredientSerializer(many=True)
+    )
+)
 class IngredientViewSet(BaseRecipeAttributeViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_through = Recipe.ingredients.through
+    through_field = 'ingredient_id'
+
+
+class JobViewSet(mixins.RetrieveModelMixin,
+                 mixins.ListModelMixin,
+                 viewsets.GenericViewSet):
+    """View the user's background jobs."""
+    serializer_class = serializers.JobSerializer
+    queryset = Job.objects.all()
+    authentication_classes = (CachedTokenAuthentication,
+                              SignedTokenAuthentication)
+    permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+
+    def get_queryset(self):
+        """Retrieve jobs for authenticated user, newest first."""
+        return self.queryset.filter(user=self.request.user).order_by('-id')
@@ -0,0 +1,168 @@
+"""
+Authentication classes for the APIs.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (BaseAuthentication,
+                                           TokenAuthentication,
+                                           get_authorization_header)
+
+from user.tokens import read_access_token
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value for key, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+
+token_user_cache = LRUCache(
+    max_size=settings.TOKEN_AUTH_CACHE_SIZE,
+    ttl=settings.TOKEN_AUTH_CACHE_TTL
+)
+
+
+def _shared_cache():
+    """Return the shared cache backing the in-process one, if configured."""
+    if settings.TOKEN_AUTH_CACHE_ALIAS is None:
+        return None
+    return caches[settings.TOKEN_AUTH_CACHE_ALIAS]
+
+
+def _shared_key(key):
+    return f'auth-token:{key}'
+
+
+def invalidate_token(key):
+    """Drop a cached token so the next request looks it up again."""
+    token_user_cache.delete(key)
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(_shared_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching the token to user resolution.
+
+    Tokens are cached in a bounded in-process LRU and, if
+    TOKEN_AUTH_CACHE_ALIAS is set, in a shared Django cache. Entries are
+    dropped when the token is deleted or its user saved, e.g. when
+    deactivated; the TTL bounds staleness for changes made in other
+    processes or without signals."""
+
+    def authenticate_credentials(self, key):
+        """Return the cached user and token, looking them up on a miss."""
+        cached = token_user_cache.get(key)
+        shared_cache = _shared_cache()
+        if cached is None and shared_cache is not None:
+            cached = shared_cache.get(_shared_key(key))
+            if cached is not None:
+                token_user_cache.set(key, cached)
+
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_user_cache.set(key, cached)
+            if shared_cache is not None:
+                shared_cache.set(
+                    _shared_key(key),
+                    cached,
+                    settings.TOKEN_AUTH_CACHE_TTL
+                )
+
+        # Views may modify request.user, so never hand out the cached one.
+        user, token = cached
+        return copy.copy(user), copy.copy(token)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authentication with stateless signed access tokens.
+
+    Clients send `Authorization: Bearer <token>`. The token is verified
+    in-process, and request.user is an unsaved user carrying only its
+    primary key, so no database query is made."""
+    keyword = 'Bearer'
+    fetch_user = False
+
+    def authenticate(self, request):
+        """Return the user of a valid bearer token, if one was sent."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header.')
+            )
+
+        try:
+            user_id = read_access_token(auth[1].decode())
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(
+                _('Invalid or expired token.')
+            )
+        return self.get_user(user_id), None
+
+    def get_user(self, user_id):
+        """Return the user for the token."""
+        user_model = get_user_model()
+        if not self.fetch_user:
+            return user_model(pk=user_id, is_active=True)
+
+        user = user_model.objects.filter(pk=user_id).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class SignedTokenUserAuthentication(SignedTokenAuthentication):
+    """Signed token authentication loading the full user, for views
+       that read or change more than the user's primary key."""
+    fetch_user = True
@@ -2,10 +2,13 @@
 Serializers for the user API View.
 """
 from django.contrib.auth import get_user_model, authenticate
+from django.utils import timezone
 from django.utils.translation import gettext as _, trim_whitespace
 
 from rest_framework import serializers
 
+from core.models import RefreshToken
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user object."""
@@ -55,3 +58,20 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for exchanging a refresh token."""
+    refresh = serializers.CharField(required=True)
+
+    def validate_refresh(self, value):
+        """Validate the refresh token is known and current."""
+        refresh_token = RefreshToken.objects.select_related('user').filter(
+            key=value,
+            expires_at__gt=timezone.now()
+        ).first()
+        if refresh_token is None or not refresh_token.user.is_active:
+            msg = _('Invalid or expired refresh token.')
+            raise serializers.ValidationError(msg, code='authentication')
+
+        return refresh_token
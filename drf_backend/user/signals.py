@@ -0,0 +1,25 @@
+"""
+Signal handlers invalidating cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_on_token_delete(sender, instance, **kwargs):
+    """Stop accepting a deleted token."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_on_user_change(sender, instance, created, **kwargs):
+    """Drop cached tokens of a changed, e.g. deactivated, user."""
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True):
+        invalidate_token(key)
@@ -0,0 +1,139 @@
+"""
+Tests for signed access tokens and refresh tokens.
+"""
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import RefreshToken
+from user.serializers import RefreshTokenSerializer
+
+TOKEN_URL = reverse('user:token')
+TOKEN_REFRESH_URL = reverse('user:token-refresh')
+ME_URL = reverse('user:me')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@override_settings(AUTH_TOKEN_MODE='signed')
+class SignedTokenTests(TestCase):
+    """Test logging in with signed access tokens."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='password123',
+        )
+        self.client = APIClient()
+
+    def login(self):
+        """Log in and return the token response data."""
+        res = self.client.post(TOKEN_URL, {
+            'email': 'user@example.com',
+            'password': 'password123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_login_returns_access_and_refresh_token(self):
+        """Test signed mode issues an access and a refresh token."""
+        data = self.login()
+
+        self.assertIn('token', data)
+        self.assertTrue(
+            RefreshToken.objects.filter(
+                key=data['refresh'],
+                user=self.user
+            ).exists()
+        )
+
+    def test_access_token_verified_without_auth_queries(self):
+        """Test a signed token authenticates without the auth tables."""
+        token = self.login()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in queries:
+            self.assertNotIn('core_user', query['sql'])
+            self.assertNotIn('authtoken', query['sql'])
+
+    def test_profile_with_access_token(self):
+        """Test the profile endpoint sees the full user."""
+        token = self.login()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_tampered_access_token_rejected(self):
+        """Test a modified access token is rejected."""
+        token = self.login()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}x')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=60)
+    def test_expired_access_token_rejected(self):
+        """Test an access token is rejected after its lifetime."""
+        token = self.login()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        expired = time.time() + 61
+        with patch('django.core.signing.time.time', return_value=expired):
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_tokens(self):
+        """Test a refresh token is exchanged once for new tokens."""
+        refresh = self.login()['refresh']
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.data)
+        self.assertNotEqual(res.data['refresh'], refresh)
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': refresh})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_refresh_rejected(self):
+        """Test a refresh token exchanged by a concurrent request after
+           this one validated it is not exchanged again."""
+        refresh = self.login()['refresh']
+        validate = RefreshTokenSerializer.validate_refresh
+
+        def validate_then_exchange(serializer, value):
+            refresh_token = validate(serializer, value)
+            RefreshToken.objects.filter(key=value).delete()
+            return refresh_token
+
+        with patch.object(RefreshTokenSerializer, 'validate_refresh',
+                          validate_then_exchange):
+            res = self.client.post(TOKEN_REFRESH_URL, {'refresh': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('token', res.data)
+
+    def test_refresh_inactive_user_rejected(self):
+        """Test a deactivated user cannot refresh tokens."""
+        refresh = self.login()['refresh']
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,47 @@
+"""
+Signed access tokens and database-backed refresh tokens.
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from core.models import RefreshToken
+
+ACCESS_TOKEN_SALT = 'user.access-token'
+
+
+def create_access_token(user):
+    """Return an HMAC-signed, timestamped access token for the user."""
+    return signing.dumps({'uid': user.pk}, salt=ACCESS_TOKEN_SALT)
+
+
+def read_access_token(token):
+    """Return the user ID from a valid access token.
+
+    Raises signing.BadSignature (or its subclass SignatureExpired)
+    for tampered or expired tokens."""
+    payload = signing.loads(
+        token,
+        salt=ACCESS_TOKEN_SALT,
+        max_age=settings.ACCESS_TOKEN_LIFETIME
+    )
+    return payload['uid']
+
+
+def issue_tokens(user):
+    """Create a refresh token and return it with a new access token."""
+    refresh_token = RefreshToken.objects.create(
+        user=user,
+        key=secrets.token_hex(32),
+        expires_at=timezone.now() + timedelta(
+            seconds=settings.REFRESH_TOKEN_LIFETIME
+        )
+    )
+    return {
+        'token': create_access_token(user),
+        'refresh': refresh_token.key,
+        'expires_in': settings.ACCESS_TOKEN_LIFETIME,
+    }
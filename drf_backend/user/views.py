@@ -1,11 +1,24 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
-from .serializers import UserSerializer, AuthTokenSerializer
+from core.models import RefreshToken
+
+from .authentication import (CachedTokenAuthentication,
+                             SignedTokenUserAuthentication)
+from .serializers import (UserSerializer,
+                          AuthTokenSerializer,
+                          RefreshTokenSerializer)
+from .tokens import issue_tokens
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -14,17 +27,61 @@ class CreateUserView(generics.CreateAPIView):
 
 
 class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user."""
+    """Create a new auth token for user.
+
+    With AUTH_TOKEN_MODE set to 'signed', return a short-lived signed
+    access token and a refresh token instead of a database token."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        if settings.AUTH_TOKEN_MODE != 'signed':
+            return super().post(request, *args, **kwargs)
+
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(issue_tokens(serializer.validated_data['user']))
+
+
+class RefreshTokenView(generics.GenericAPIView):
+    """Exchange a refresh token for a new access and refresh token."""
+    serializer_class = RefreshTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh_token = serializer.validated_data['refresh']
+        # Refresh tokens are single use. The token is claimed by deleting
+        # it, so of concurrent requests with it only one gets new tokens.
+        with transaction.atomic():
+            claimed = RefreshToken.objects.filter(
+                pk=refresh_token.pk,
+                expires_at__gt=timezone.now()
+            ).delete()[0]
+            tokens = claimed and issue_tokens(refresh_token.user)
+        if not claimed:
+            return Response(
+                {'detail': _('Invalid or expired refresh token.')},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return Response(tokens)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,
+                              SignedTokenUserAuthentication)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        """Retrieve and return authenticated user."""
-        return self.request.user
+        """Retrieve and return authenticated user.
+
+        Updates re-read the user, since cached authentication returns a
+        copy whose other fields may be outdated and saving writes all."""
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.pk)
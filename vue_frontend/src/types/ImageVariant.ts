@@ -0,0 +1,5 @@
+export interface ImageVariant {
+  width: number;
+  format: string;
+  url: string;
+}
@@ -1,4 +1,5 @@
 export interface Ingredient {
   id?: number;
   name: string;
+  recipeCount?: number;
 }
@@ -1,5 +1,6 @@
 import {Tag} from './Tag';
 import {Ingredient} from './Ingredient';
+import {ImageVariant} from './ImageVariant';
 
 export interface Recipe {
   id?: number;
@@ -11,4 +12,5 @@ export interface Recipe {
   ingredients?: Ingredient[];
   description?: string;
   image?: string | File | null;
+  imageVariants?: ImageVariant[];
 }
@@ -1,4 +1,5 @@
 export interface Tag {
   id?: number;
   name: string;
+  recipeCount?: number;
 }
@@ -0,0 +1,16 @@
+import { Recipe } from '@/types/Recipe';
+
+export const pickImageVariant = (recipe: Recipe, width: number) => {
+  /**
+   * Returns the URL of the smallest WebP variant at least `width` pixels
+   * wide, falling back to the largest one and then to the original image.
+   */
+  const variants = (recipe.imageVariants ?? [])
+    .filter((variant) => variant.format === 'webp')
+    .sort((a, b) => a.width - b.width);
+  if (variants.length === 0) {
+    return typeof recipe.image === 'string' ? recipe.image : null;
+  }
+  const variant = variants.find((v) => v.width >= width) ?? variants[variants.length - 1];
+  return variant.url;
+}